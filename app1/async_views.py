@@ -0,0 +1,81 @@
+from rest_framework import status
+
+from demo.async_views import AsyncAPIView
+
+from .models import Address, Cart, Category, CartItem, Item, Order
+from .pagination import KeysetPagination
+from .serializers import (AddressSerializer, CartItemSerializer, CategorySerializer, ItemFilterSerializer,
+                          ItemSerializer, OrderSerializer)
+from .utils import STREAM_CHUNK_SIZE, astream_json_array
+
+
+class AsyncItemAPI(AsyncAPIView):
+    authentication_required = False
+
+    async def get(self, request):
+        filters = ItemFilterSerializer(data=request.GET)
+        if not filters.is_valid():
+            return self.respond(filters.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        items = filters.filter_queryset(Item.objects.filter(is_active=True, stock_count__gt=0))
+        paginator = KeysetPagination()
+        page = await paginator.apaginate_queryset(items, request)
+        serializer = ItemSerializer(page, many=True)
+        return self.respond(paginator.get_paginated_response(serializer.data).data)
+
+
+class AsyncCategoryAPI(AsyncAPIView):
+    authentication_required = False
+
+    async def get(self, request):
+        categories = [
+            category async for category in Category.objects.filter(is_active=True).prefetch_related('items')
+        ]
+        serializer = CategorySerializer(categories, many=True)
+        return self.respond(serializer.data)
+
+
+class AsyncCartAPIView(AsyncAPIView):
+    async def get(self, request):
+        if request.user.is_superuser:
+            cart_items = (
+                CartItem.objects.select_related('cart__user', 'item')
+                .order_by('pk')
+                .aiterator(chunk_size=STREAM_CHUNK_SIZE)
+            )
+            return astream_json_array(cart_items, self.serialize_cart_item)
+
+        cart, _ = await Cart.objects.aget_or_create(user=request.user)
+        cart_items = [cart_item async for cart_item in cart.cart_items.select_related('item')]
+        serializer = CartItemSerializer(cart_items, many=True)
+        return self.respond(serializer.data)
+
+    def serialize_cart_item(self, cart_item):
+        serialized_item = CartItemSerializer(cart_item).data
+        serialized_item['user'] = {
+            "id": str(cart_item.cart.user.id),
+            "username": cart_item.cart.user.username,
+            "email": cart_item.cart.user.email
+        }
+        return serialized_item
+
+
+class AsyncOrderAPIView(AsyncAPIView):
+    async def get(self, request):
+        orders = Order.objects.select_related('user').prefetch_related('order_items__item')
+        if request.user.is_superuser:
+            return astream_json_array(
+                orders.order_by('pk').aiterator(chunk_size=STREAM_CHUNK_SIZE),
+                lambda order: OrderSerializer(order).data,
+            )
+
+        orders = [order async for order in orders.filter(user=request.user)]
+        serializer = OrderSerializer(orders, many=True)
+        return self.respond(serializer.data)
+
+
+class AsyncAddressAPIView(AsyncAPIView):
+    async def get(self, request):
+        addresses = [address async for address in Address.objects.filter(user=request.user)]
+        serializer = AddressSerializer(addresses, many=True)
+        return self.respond(serializer.data)
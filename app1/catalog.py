@@ -0,0 +1,84 @@
+from django.db import transaction
+from django.db.models import Prefetch
+
+from demo.cache import bump_key_generations, get_cache, get_key_generations, record
+from demo.routers import use_primary
+
+from .models import Category, Item
+from .serializers import CatalogCategorySerializer
+
+CATALOG_CACHE_TIMEOUT = 60 * 60
+CATEGORY_IDS_GENERATION_KEY = 'gen:catalog:tree:categories'
+
+
+def category_generation_key(category_id):
+    return f'gen:catalog:tree:category:{category_id}'
+
+
+def category_node_key(category_id, generation):
+    return f'catalog:tree:category:{category_id}:{generation}'
+
+
+def category_node_keys(category_ids):
+    generations = get_key_generations([category_generation_key(category_id) for category_id in category_ids])
+    return {
+        category_id: category_node_key(category_id, generation)
+        for category_id, generation in zip(category_ids, generations)
+    }
+
+
+def available_items():
+    return Item.objects.filter(is_active=True, stock_count__gt=0)
+
+
+def build_category_nodes(category_ids):
+    categories = (
+        Category.objects
+        .filter(pk__in=category_ids, is_active=True)
+        .prefetch_related(Prefetch(
+            'items',
+            queryset=available_items().order_by('-created_at', '-id'),
+            to_attr='available_items',
+        ))
+    )
+    return {str(category.pk): CatalogCategorySerializer(category).data for category in categories}
+
+
+def get_catalog_tree():
+    # The tree is cached as one node per category plus the ordered list of
+    # active category ids, so a change only forces its own node to be rebuilt.
+    # Every key carries a generation read before the rows are, so a rebuild
+    # that raced a change is written under a key nobody reads any more.
+    cache = get_cache()
+    [structure] = get_key_generations([CATEGORY_IDS_GENERATION_KEY])
+    ids_key = f'catalog:tree:categories:{structure}'
+    category_ids = cache.get(ids_key)
+    if category_ids is None:
+        # Whatever is cached is read from the primary (see demo.routers).
+        with use_primary():
+            category_ids = [
+                str(pk) for pk in
+                Category.objects.filter(is_active=True).order_by('created_at', 'id').values_list('pk', flat=True)
+            ]
+        cache.set(ids_key, category_ids, CATALOG_CACHE_TIMEOUT)
+
+    keys = category_node_keys(category_ids)
+    nodes = cache.get_many(list(keys.values()))
+    missing = [category_id for category_id, key in keys.items() if key not in nodes]
+    record('catalog-tree', 'miss' if missing else 'hit')
+    if missing:
+        with use_primary():
+            rebuilt = {keys[category_id]: node for category_id, node in build_category_nodes(missing).items()}
+        cache.set_many(rebuilt, CATALOG_CACHE_TIMEOUT)
+        nodes.update(rebuilt)
+
+    return [nodes[key] for key in keys.values() if key in nodes]
+
+
+def invalidate_categories(category_ids, structure=False):
+    keys = [category_generation_key(str(category_id)) for category_id in set(category_ids) if category_id]
+    if structure:
+        keys.append(CATEGORY_IDS_GENERATION_KEY)
+    # Bumped at commit so a concurrent reader can't repopulate a node from
+    # rows this transaction is still changing.
+    transaction.on_commit(lambda: bump_key_generations(keys))
@@ -0,0 +1,161 @@
+"""
+Bulk item import from CSV or JSON Lines, upserted on the supplier SKU.
+
+Rows are read one at a time from any iterable of byte lines (an uploaded
+request body, an open file), validated and written ``chunk_size`` at a time,
+so memory stays flat however large the input is. A bad row is reported with
+its line number and skipped; it never aborts the rest of the import.
+"""
+import csv
+import json
+
+from django.db import DatabaseError, transaction
+from rest_framework.exceptions import ValidationError
+
+from .models import Category, Item
+from .serializers import ItemImportRowSerializer
+from .stock import catalog_changed
+
+IMPORT_CHUNK_SIZE = 1000
+MAX_REPORTED_ERRORS = 1000
+UPSERT_FIELDS = ['category', 'description', 'rate', 'stock_count', 'is_active']
+
+# Format names and the content types that select them.
+FORMATS = {
+    'csv': 'csv',
+    'text/csv': 'csv',
+    'jsonl': 'jsonl',
+    'application/jsonl': 'jsonl',
+    'application/x-ndjson': 'jsonl',
+}
+
+
+class ImportReport:
+    def __init__(self):
+        self.created = 0
+        self.updated = 0
+        self.failed = 0
+        self.errors = []
+
+    def error(self, line, errors, sku=None):
+        self.failed += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({'line': line, 'sku': sku, 'errors': errors})
+
+    def as_dict(self):
+        return {
+            'created': self.created,
+            'updated': self.updated,
+            'failed': self.failed,
+            'errors': self.errors,
+            'errors_truncated': self.failed > len(self.errors),
+        }
+
+
+def decode_lines(lines):
+    for number, line in enumerate(lines):
+        text = line.decode('utf-8') if isinstance(line, bytes) else line
+        yield text.lstrip('\ufeff') if number == 0 else text
+
+
+def read_csv(lines):
+    reader = csv.DictReader(decode_lines(lines))
+    for row in reader:
+        # Empty cells fall back to the field defaults.
+        yield reader.line_num, {key: value for key, value in row.items() if key and value not in ('', None)}, False
+
+
+def read_jsonl(lines):
+    for number, text in enumerate(decode_lines(lines), start=1):
+        if not text.strip():
+            continue
+        try:
+            row = json.loads(text)
+        except ValueError as exc:
+            yield number, {'non_field_errors': [f'Invalid JSON: {exc}']}, True
+            continue
+        if not isinstance(row, dict):
+            yield number, {'non_field_errors': ['Each line must be a JSON object.']}, True
+            continue
+        yield number, row, False
+
+
+def category_map():
+    categories = {}
+    for pk, name in Category.objects.values_list('pk', 'name'):
+        categories[str(pk)] = pk
+        if name:
+            categories.setdefault(name.strip().lower(), pk)
+    return categories
+
+
+def import_items(lines, fmt, user=None, chunk_size=IMPORT_CHUNK_SIZE):
+    """
+    Upsert the items in ``lines`` (CSV with a header row, or JSON Lines) and
+    return an ImportReport. New items are owned by ``user``.
+    """
+    report = ImportReport()
+    # One serializer validates every row: building its fields per row would
+    # cost more than the database writes.
+    validator = ItemImportRowSerializer(categories=category_map())
+    read_rows = read_csv if fmt == 'csv' else read_jsonl
+    chunk = {}
+
+    for number, row, broken in read_rows(lines):
+        if broken:
+            report.error(number, row)
+            continue
+        try:
+            data = validator.run_validation(row)
+        except ValidationError as exc:
+            report.error(number, exc.detail, sku=row.get('sku'))
+            continue
+        # A SKU repeated within one chunk keeps its last row.
+        chunk.pop(data['sku'], None)
+        chunk[data['sku']] = (number, data)
+        if len(chunk) >= chunk_size:
+            write_chunk(chunk, user, report)
+            chunk = {}
+
+    if chunk:
+        write_chunk(chunk, user, report)
+    return report
+
+
+def write_chunk(chunk, user, report):
+    items = {
+        sku: Item(
+            sku=sku, user=user, category_id=data['category'], description=data['description'],
+            rate=data['rate'], stock_count=data['stock_count'], is_active=data['is_active'],
+        )
+        for sku, (_, data) in chunk.items()
+    }
+    try:
+        with transaction.atomic():
+            updated = upsert_items(items)
+        written = len(items)
+    except DatabaseError:
+        # One bad row fails the whole statement. Retry the chunk a row at a
+        # time, each in its own savepoint, so only the bad rows are reported.
+        updated = written = 0
+        with transaction.atomic():
+            for sku, item in items.items():
+                try:
+                    with transaction.atomic():
+                        updated += upsert_items({sku: item})
+                    written += 1
+                except DatabaseError as exc:
+                    report.error(chunk[sku][0], {'non_field_errors': [f'Could not be saved: {exc}']}, sku=sku)
+
+    report.updated += updated
+    report.created += written - updated
+
+
+def upsert_items(items):
+    """Upsert ``items`` ({sku: Item}); returns how many already existed."""
+    previous = dict(Item.objects.filter(sku__in=items).values_list('sku', 'category_id'))
+    Item.objects.bulk_create(
+        list(items.values()), update_conflicts=True, unique_fields=['sku'], update_fields=UPSERT_FIELDS,
+    )
+    catalog_changed({item.category_id for item in items.values()} | set(previous.values()))
+    return len(previous)
@@ -0,0 +1,256 @@
+import hashlib
+import io
+import json
+import multiprocessing
+import threading
+import zipfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import storages
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.styles import getSampleStyleSheet
+from reportlab.platypus import Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
+
+STYLES = getSampleStyleSheet()
+TABLE_STYLE = TableStyle([
+    ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
+    ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+    ('ALIGN', (1, 1), (-1, -1), 'CENTER'),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
+    ('GRID', (0, 0), (-1, -1), 1, colors.black),
+])
+
+
+def invoice_storage():
+    return storages['invoices']
+
+
+def invoice_context(order, order_items):
+    """Everything printed on the invoice, as plain data."""
+    address = order.address
+    return {
+        'order_id': str(order.id),
+        'customer': order.user.username,
+        'address': f"{address.address_line}, {address.city}, {address.state}, {address.postal_code}, {address.country}",
+        'order_date': order.created_at.strftime('%Y-%m-%d %H:%M'),
+        'is_paid': order.is_paid,
+        'lines': [
+            [order_item.item.description, order_item.quantity, order_item.rate, order_item.line_total]
+            for order_item in order_items
+        ],
+        'discounted_amount': order.discounted_amount,
+        'total_amount': order.total_amount,
+    }
+
+
+def invoice_fingerprint(context):
+    return hashlib.sha256(json.dumps(context, sort_keys=True).encode('utf-8')).hexdigest()
+
+
+def invoice_filename(context):
+    return f"Invoice_{context['order_id'][:8].upper()}.pdf"
+
+
+def render_invoice(context):
+    buffer = BytesIO()
+    # invariant drops the creation timestamp and random document id, so the
+    # same context always renders to the same bytes.
+    doc = SimpleDocTemplate(buffer, pagesize=A4, invariant=True)
+    elements = []
+
+    short_order_id = context['order_id'][:8].upper()
+    elements.append(Paragraph(f"INVOICE - Order #{short_order_id}", STYLES['Title']))
+    elements.append(Spacer(1, 12))
+
+    elements.append(Paragraph(f"Customer: {context['customer']}", STYLES['Normal']))
+    elements.append(Paragraph(f"Shipping Address: {context['address']}", STYLES['Normal']))
+    elements.append(Paragraph(f"Order Date: {context['order_date']}", STYLES['Normal']))
+    elements.append(Paragraph(f"Payment Status: {'PAID' if context['is_paid'] else 'UNPAID'}", STYLES['Normal']))
+    elements.append(Spacer(1, 12))
+
+    table_data = [["Item Description", "Quantity", "Rate (₹)", "Line Total (₹)"]]
+
+    original_total = 0.0
+    for description, quantity, rate, line_total in context['lines']:
+        table_data.append([description, str(quantity), f"{rate:.2f}", f"{line_total:.2f}"])
+        original_total += line_total
+
+    table_data.append(["", "", "Subtotal", f"{original_total:.2f}"])
+
+    if context['discounted_amount'] > 0:
+        table_data.append(["", "", "Discount", f"-{context['discounted_amount']:.2f}"])
+
+    table_data.append(["", "", "Total Payable", f"{context['total_amount']:.2f}"])
+
+    table = Table(table_data, hAlign='LEFT', colWidths=[200, 80, 80, 80])
+    table.setStyle(TABLE_STYLE)
+
+    elements.append(table)
+    doc.build(elements)
+    return buffer.getvalue()
+
+
+def stored_invoice_name(fingerprint):
+    return f"{fingerprint[:2]}/{fingerprint}.pdf"
+
+
+def ensure_invoice(context, fingerprint=None):
+    """
+    Return the storage name of the rendered invoice, rendering it first if
+    this exact content has never been stored. Invoices are addressed by a hash
+    of what they print, so any change to the order yields a new name and the
+    old file is simply never asked for again.
+    """
+    fingerprint = fingerprint or invoice_fingerprint(context)
+    name = stored_invoice_name(fingerprint)
+    storage = invoice_storage()
+    if not storage.exists(name):
+        name = storage.save(name, ContentFile(render_invoice(context)))
+    return name
+
+
+class _ArchiveBuffer(io.RawIOBase):
+    # Write-only sink for ZipFile that hands back whatever was written since
+    # the last drain, so the archive can be streamed without being held whole.
+    def __init__(self):
+        self.chunks = []
+        self.offset = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        self.offset += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.offset
+
+    def drain(self):
+        data = b''.join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def new_render_pool(workers):
+    return ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context('spawn'))
+
+
+_render_pool = None
+_render_pool_lock = threading.Lock()
+
+
+def get_render_pool():
+    """
+    The process pool every export in this worker shares, started on first use.
+    Concurrent exports queue on it, so a worker never runs more than
+    ``INVOICE_RENDER_WORKERS`` rendering processes.
+    """
+    global _render_pool
+    with _render_pool_lock:
+        if _render_pool is None:
+            _render_pool = new_render_pool(settings.INVOICE_RENDER_WORKERS)
+        return _render_pool
+
+
+def discard_render_pool(pool):
+    global _render_pool
+    with _render_pool_lock:
+        if _render_pool is pool:
+            _render_pool = None
+    pool.shutdown(wait=False, cancel_futures=True)
+
+
+@receiver(setting_changed)
+def reset_render_pool(setting, **kwargs):
+    if setting == 'INVOICE_RENDER_WORKERS' and _render_pool is not None:
+        discard_render_pool(_render_pool)
+
+
+def render_invoices(contexts, workers=None):
+    """
+    Yield ``(context, pdf_bytes)`` for each context, in order.
+
+    Invoices already in storage are read back; the rest are rendered in the
+    shared pool, or in a private pool of ``workers`` processes when given (for
+    one-off exports from the command line). At most twice the pool size
+    renders are in flight at a time, so memory is bounded by the pool size
+    rather than by the number of orders.
+    """
+    if workers is None:
+        pool = get_render_pool()
+        try:
+            yield from _render_invoices(contexts, pool, settings.INVOICE_RENDER_WORKERS)
+        except BrokenProcessPool:
+            # A crashed renderer breaks the pool for good; start afresh next time.
+            discard_render_pool(pool)
+            raise
+    else:
+        with new_render_pool(workers) as pool:
+            yield from _render_invoices(contexts, pool, workers)
+
+
+def _render_invoices(contexts, pool, workers):
+    storage = invoice_storage()
+    pending = deque()
+
+    def finish(context, fingerprint, result):
+        if isinstance(result, bytes):
+            return context, result
+        pdf = result.result()
+        storage.save(stored_invoice_name(fingerprint), ContentFile(pdf))
+        return context, pdf
+
+    try:
+        for context in contexts:
+            fingerprint = invoice_fingerprint(context)
+            name = stored_invoice_name(fingerprint)
+            if storage.exists(name):
+                with storage.open(name, 'rb') as stored:
+                    result = stored.read()
+            else:
+                result = pool.submit(render_invoice, context)
+            pending.append((context, fingerprint, result))
+            if len(pending) >= 2 * workers:
+                yield finish(*pending.popleft())
+        while pending:
+            yield finish(*pending.popleft())
+    finally:
+        # An abandoned download mustn't leave its renders queued in a shared pool.
+        for _, _, result in pending:
+            if not isinstance(result, bytes):
+                result.cancel()
+
+
+def invoice_contexts(orders):
+    orders = (
+        orders.select_related('user', 'address')
+        .prefetch_related('order_items__item')
+        .order_by('created_at', 'id')
+        .iterator(chunk_size=200)
+    )
+    for order in orders:
+        yield invoice_context(order, order.order_items.all())
+
+
+def iter_invoice_archive(orders, workers=None, progress=None):
+    """Yield a ZIP archive of the invoices for ``orders`` chunk by chunk."""
+    total = orders.count()
+    buffer = _ArchiveBuffer()
+    with zipfile.ZipFile(buffer, 'w', compression=zipfile.ZIP_DEFLATED) as archive:
+        for done, (context, pdf) in enumerate(render_invoices(invoice_contexts(orders), workers), start=1):
+            archive.writestr(f"Invoice_{context['order_id']}.pdf", pdf)
+            if progress:
+                progress(done, total)
+            yield buffer.drain()
+    yield buffer.drain()
@@ -0,0 +1,111 @@
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.utils import load_backend
+
+MODES = ['connect', 'persistent', 'pool']
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure what connection handling costs each request. Every simulated request runs the same "
+        "request_started/request_finished connection housekeeping as a real one plus --queries trivial "
+        "queries, under three setups: a new connection per request (CONN_MAX_AGE=0), a persistent "
+        "health-checked connection per thread, and a psycopg pool (PostgreSQL with psycopg 3 only). "
+        "The overhead column is each setup's mean minus the fastest one's. Run it from the app host "
+        "against the real database server, since the handshake cost is mostly network and TLS."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS)
+        parser.add_argument('--requests', type=int, default=500)
+        parser.add_argument('--queries', type=int, default=2, help="Queries per simulated request.")
+        parser.add_argument('--threads', type=int, default=1,
+                            help="Threads issuing requests, as in a threaded WSGI worker.")
+        parser.add_argument('--mode', action='append', choices=MODES,
+                            help="Setup to measure; repeat for several (default: all).")
+
+    def handle(self, *args, **options):
+        if options['database'] not in connections:
+            raise CommandError(f"Unknown database {options['database']!r}.")
+        base = connections[options['database']].settings_dict
+
+        results = {}
+        for mode in options['mode'] or MODES:
+            settings_dict = self.settings_for(mode, base, options)
+            if settings_dict is None:
+                continue
+            results[mode] = self.run(mode, settings_dict, options)
+
+        if not results:
+            return
+        fastest = min(statistics.mean(latencies) for _, latencies in results.values())
+        self.stdout.write(f"{'mode':<12}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'overhead ms':>13}")
+        for mode, (elapsed, latencies) in results.items():
+            latencies = sorted(latencies)
+            p95 = latencies[int(len(latencies) * 0.95) - 1]
+            self.stdout.write(
+                f"{mode:<12}{len(latencies) / elapsed:>10.0f}{statistics.median(latencies) * 1000:>10.2f}"
+                f"{p95 * 1000:>10.2f}{(statistics.mean(latencies) - fastest) * 1000:>13.2f}"
+            )
+
+    def settings_for(self, mode, base, options):
+        db_options = {key: value for key, value in base['OPTIONS'].items() if key != 'pool'}
+        if mode == 'connect':
+            return {**base, 'OPTIONS': db_options, 'CONN_MAX_AGE': 0, 'CONN_HEALTH_CHECKS': False}
+        if mode == 'persistent':
+            return {**base, 'OPTIONS': db_options, 'CONN_MAX_AGE': None, 'CONN_HEALTH_CHECKS': True}
+
+        if base['ENGINE'] != 'django.db.backends.postgresql':
+            self.stderr.write("pool: skipped, pooling needs PostgreSQL.")
+            return None
+        try:
+            import psycopg_pool  # noqa: F401
+        except ImportError:
+            self.stderr.write("pool: skipped, install psycopg[pool].")
+            return None
+        # The configured pool options, or a pool with a connection per thread.
+        pool = base['OPTIONS'].get('pool')
+        if not isinstance(pool, dict):
+            pool = {'min_size': options['threads'], 'max_size': options['threads']}
+        return {**base, 'OPTIONS': {**db_options, 'pool': pool}, 'CONN_MAX_AGE': 0, 'CONN_HEALTH_CHECKS': True}
+
+    def run(self, mode, settings_dict, options):
+        alias = f'bench_{mode}'
+        backend = load_backend(settings_dict['ENGINE'])
+        per_thread = [options['requests'] // options['threads']] * options['threads']
+        per_thread[0] += options['requests'] % options['threads']
+
+        def worker(count):
+            connection = backend.DatabaseWrapper(settings_dict, alias)
+            latencies = []
+            try:
+                for _ in range(count):
+                    start = time.perf_counter()
+                    self.request(connection, options['queries'])
+                    latencies.append(time.perf_counter() - start)
+            finally:
+                connection.close()
+            return latencies
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options['threads']) as executor:
+            latencies = [latency for batch in executor.map(worker, per_thread) for latency in batch]
+        elapsed = time.perf_counter() - started
+
+        if settings_dict['OPTIONS'].get('pool'):
+            backend.DatabaseWrapper(settings_dict, alias).close_pool()
+        return elapsed, latencies
+
+    def request(self, connection, queries):
+        # What close_old_connections() does on request_started and
+        # request_finished: drop the connection if it is broken or too old.
+        connection.close_if_unusable_or_obsolete()
+        for _ in range(queries):
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT 1')
+                cursor.fetchone()
+        connection.close_if_unusable_or_obsolete()
@@ -0,0 +1,83 @@
+import asyncio
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.test import AsyncClient, Client
+
+from authentication.authentication import add_user_claims, cache_user_snapshot
+from authentication.tokens import CachedRefreshToken
+
+READ_PATHS = [
+    ('/api/items/', '/api/async/items/'),
+    ('/api/categoryAPI/', '/api/async/categoryAPI/'),
+    ('/api/cart/', '/api/async/cart/'),
+    ('/api/order/', '/api/async/order/'),
+    ('/api/address/', '/api/async/address/'),
+]
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare throughput of the sync (WSGI) and async (ASGI) read endpoints at a given concurrency. "
+        "Requests go through Django's WSGI and ASGI handlers in-process, so the numbers isolate the "
+        "framework and ORM cost from the HTTP server; run against a copy of production data."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--username', required=True, help="User whose token authenticates the requests.")
+        parser.add_argument('--requests', type=int, default=2000)
+        parser.add_argument('--concurrency', type=int, default=200)
+        parser.add_argument('--wsgi-threads', type=int, default=16,
+                            help="Worker threads serving the sync endpoints, as in a threaded WSGI server.")
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(username=options['username'])
+        except User.DoesNotExist:
+            raise CommandError(f"User {options['username']!r} does not exist.")
+        # Same token and warm user snapshot that LoginView hands out, so the
+        # requests authenticate the way production ones do.
+        token = add_user_claims(CachedRefreshToken.for_user(user), user).access_token
+        cache_user_snapshot(user)
+        self.auth = f'Bearer {token}'
+
+        self.stdout.write(f"{'endpoint':<28}{'mode':<7}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}")
+        for sync_path, async_path in READ_PATHS:
+            self.report(sync_path, 'wsgi', *self.run_sync(sync_path, options))
+            self.report(async_path, 'asgi', *asyncio.run(self.run_async(async_path, options)))
+
+    def run_sync(self, path, options):
+        def fetch(_):
+            start = time.perf_counter()
+            Client().get(path, HTTP_AUTHORIZATION=self.auth)
+            return time.perf_counter() - start
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=options['wsgi_threads']) as pool:
+            latencies = list(pool.map(fetch, range(options['requests'])))
+        return time.perf_counter() - started, latencies
+
+    async def run_async(self, path, options):
+        client = AsyncClient()
+        gate = asyncio.Semaphore(options['concurrency'])
+
+        async def fetch():
+            async with gate:
+                start = time.perf_counter()
+                await client.get(path, headers={'Authorization': self.auth})
+                return time.perf_counter() - start
+
+        started = time.perf_counter()
+        latencies = await asyncio.gather(*(fetch() for _ in range(options['requests'])))
+        return time.perf_counter() - started, latencies
+
+    def report(self, path, mode, elapsed, latencies):
+        latencies = sorted(latencies)
+        p95 = latencies[int(len(latencies) * 0.95) - 1]
+        self.stdout.write(
+            f"{path:<28}{mode:<7}{len(latencies) / elapsed:>10.0f}"
+            f"{statistics.median(latencies) * 1000:>10.1f}{p95 * 1000:>10.1f}"
+        )
@@ -0,0 +1,38 @@
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+
+from app1.invoices import iter_invoice_archive
+from app1.models import Order
+from app1.serializers import InvoiceExportFilterSerializer
+
+
+class Command(BaseCommand):
+    help = "Render the invoices for a set of orders in parallel and write them to a ZIP archive."
+
+    def add_arguments(self, parser):
+        parser.add_argument('output', help="Path of the ZIP archive to write.")
+        parser.add_argument('--from', dest='date_from', help="First order date to include (YYYY-MM-DD).")
+        parser.add_argument('--to', dest='date_to', help="Last order date to include (YYYY-MM-DD).")
+        parser.add_argument('--status', dest='order_status', help="Only include orders with this status.")
+        parser.add_argument('--user', help="Only include orders placed by this user id.")
+        parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                            help="Rendering processes (defaults to the CPU count).")
+
+    def handle(self, *args, **options):
+        filters = InvoiceExportFilterSerializer(data={
+            key: options[key] for key in ('date_from', 'date_to', 'order_status', 'user') if options[key]
+        })
+        if not filters.is_valid():
+            raise CommandError(filters.errors)
+
+        orders = filters.filter_queryset(Order.objects.all())
+        with open(options['output'], 'wb') as output:
+            for chunk in iter_invoice_archive(orders, workers=options['workers'], progress=self.report):
+                output.write(chunk)
+        self.stdout.write(self.style.SUCCESS(f"Wrote {options['output']}"))
+
+    def report(self, done, total):
+        self.stdout.write(f"\r{done}/{total} invoices", ending='')
+        if done == total:
+            self.stdout.write('')
@@ -0,0 +1,43 @@
+import os
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+
+from app1.imports import FORMATS, IMPORT_CHUNK_SIZE, import_items
+
+
+class Command(BaseCommand):
+    help = (
+        "Upsert items from a CSV (with a header row) or JSON Lines file, keyed on the supplier SKU. "
+        "Columns: sku, category (id or name), description, rate, stock_count, is_active."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="File to import.")
+        parser.add_argument('--format', choices=['csv', 'jsonl'],
+                            help="Input format (defaults to the file extension).")
+        parser.add_argument('--user', help="Username that owns newly created items.")
+        parser.add_argument('--chunk-size', type=int, default=IMPORT_CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        fmt = options['format'] or FORMATS.get(os.path.splitext(options['path'])[1].lstrip('.').lower())
+        if fmt is None:
+            raise CommandError("Can't tell the format from the file name; pass --format.")
+
+        user = None
+        if options['user']:
+            try:
+                user = User.objects.get(username=options['user'])
+            except User.DoesNotExist:
+                raise CommandError(f"User {options['user']!r} does not exist.")
+
+        with open(options['path'], 'rb') as lines:
+            report = import_items(lines, fmt, user=user, chunk_size=options['chunk_size'])
+
+        for error in report.errors:
+            self.stderr.write(f"line {error['line']} ({error['sku'] or 'no sku'}): {error['errors']}")
+        if report.failed > len(report.errors):
+            self.stderr.write(f"... and {report.failed - len(report.errors)} more failed rows")
+        self.stdout.write(self.style.SUCCESS(
+            f"Created {report.created}, updated {report.updated}, failed {report.failed}."
+        ))
@@ -0,0 +1,19 @@
+from django.db import migrations
+
+
+def normalize_pending_orders(apps, schema_editor):
+    # Orders placed while the field defaulted to "pending" don't match the
+    # "Pending" choice, so they could never be cancelled.
+    Order = apps.get_model('app1', 'Order')
+    Order.objects.using(schema_editor.connection.alias).filter(order_status='pending').update(order_status='Pending')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app1', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(normalize_pending_orders, migrations.RunPython.noop),
+    ]
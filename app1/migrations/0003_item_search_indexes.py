@@ -0,0 +1,85 @@
+from django.contrib.postgres.indexes import GinIndex, OpClass
+from django.contrib.postgres.search import SearchVector
+from django.db import migrations
+
+# Item search (app1.search). Neither schema fits in model state: the GIN
+# indexes only exist on PostgreSQL and the FTS5 table only on SQLite, so both
+# are created here by hand, on the matching backend only. Every step is
+# idempotent, for databases that got them from the old post_migrate hook.
+# Unapplying keeps pg_trgm, which other schemas in the database may use.
+#
+# SQLite drops the triggers when it rebuilds app1_item, which it does for
+# most AlterField/RemoveField on the table: a migration that does that must
+# run SQLITE_FTS_SQL again.
+
+SEARCH_INDEXES = [
+    GinIndex(SearchVector('description', config='english'), name='item_description_fts_idx'),
+    GinIndex(OpClass('description', name='gin_trgm_ops'), name='item_description_trgm_idx'),
+]
+
+SQLITE_FTS_SQL = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS app1_item_fts USING fts5("
+    "description, content='app1_item', content_rowid='rowid', tokenize='porter unicode61')",
+    "CREATE TRIGGER IF NOT EXISTS app1_item_fts_insert AFTER INSERT ON app1_item BEGIN "
+    "INSERT INTO app1_item_fts(rowid, description) VALUES (new.rowid, new.description); END",
+    "CREATE TRIGGER IF NOT EXISTS app1_item_fts_delete AFTER DELETE ON app1_item BEGIN "
+    "INSERT INTO app1_item_fts(app1_item_fts, rowid, description) VALUES ('delete', old.rowid, old.description); END",
+    "CREATE TRIGGER IF NOT EXISTS app1_item_fts_update AFTER UPDATE OF description ON app1_item BEGIN "
+    "INSERT INTO app1_item_fts(app1_item_fts, rowid, description) VALUES ('delete', old.rowid, old.description); "
+    "INSERT INTO app1_item_fts(rowid, description) VALUES (new.rowid, new.description); END",
+    "INSERT INTO app1_item_fts(app1_item_fts) VALUES ('rebuild')",
+]
+
+SQLITE_FTS_DROP_SQL = [
+    "DROP TRIGGER IF EXISTS app1_item_fts_insert",
+    "DROP TRIGGER IF EXISTS app1_item_fts_delete",
+    "DROP TRIGGER IF EXISTS app1_item_fts_update",
+    "DROP TABLE IF EXISTS app1_item_fts",
+]
+
+
+def existing_indexes(schema_editor, model):
+    connection = schema_editor.connection
+    with connection.cursor() as cursor:
+        return connection.introspection.get_constraints(cursor, model._meta.db_table)
+
+
+def create_search_schema(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+        Item = apps.get_model('app1', 'Item')
+        existing = existing_indexes(schema_editor, Item)
+        for index in SEARCH_INDEXES:
+            if index.name not in existing:
+                schema_editor.add_index(Item, index, concurrently=True)
+    elif vendor == 'sqlite':
+        for statement in SQLITE_FTS_SQL:
+            schema_editor.execute(statement)
+
+
+def drop_search_schema(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'postgresql':
+        Item = apps.get_model('app1', 'Item')
+        existing = existing_indexes(schema_editor, Item)
+        for index in SEARCH_INDEXES:
+            if index.name in existing:
+                schema_editor.remove_index(Item, index, concurrently=True)
+    elif vendor == 'sqlite':
+        for statement in SQLITE_FTS_DROP_SQL:
+            schema_editor.execute(statement)
+
+
+class Migration(migrations.Migration):
+
+    # CREATE INDEX CONCURRENTLY can't run inside a transaction.
+    atomic = False
+
+    dependencies = [
+        ('app1', '0002_normalize_pending_orders'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_schema, drop_search_schema),
+    ]
@@ -2,7 +2,9 @@ import uuid
 from django.db import models
 from django.contrib.auth.models import User
 
-    
+AVAILABLE_ITEMS = models.Q(is_active=True, stock_count__gt=0)
+
+
 class Category(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='categories',null=True, blank=True)
@@ -10,17 +12,45 @@ class Category(models.Model):
     is_active = models.BooleanField(default=True)
     created_at = models.DateTimeField(auto_now_add=True, null=True, blank=True)
 
+    class Meta:
+        indexes = [
+            # The category list and the catalog tree only read active categories.
+            models.Index(fields=['created_at', 'id'], condition=models.Q(is_active=True),
+                         name='category_active_created_idx'),
+        ]
+
 
 class Item(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='items',null=True, blank=True)
     category = models.ForeignKey(Category, on_delete=models.CASCADE, related_name='items')    
+    sku = models.CharField(max_length=64, unique=True, null=True, blank=True, help_text="Supplier SKU, the key for bulk imports")
     description = models.TextField(blank=True)
     rate = models.FloatField(null=True, blank=True)
     is_active = models.BooleanField(default=True)
     stock_count = models.IntegerField(default=0)
     created_at = models.DateTimeField(auto_now_add=True, null=True, blank=True)
 
+    class Meta:
+        indexes = [
+            models.Index(fields=['created_at', 'id'], name='item_created_at_id_idx'),
+            # The item list, search and the catalog tree only show available
+            # items; these keep their newest-first pages to a range scan.
+            models.Index(fields=['created_at', 'id'], condition=AVAILABLE_ITEMS,
+                         name='item_available_created_idx'),
+            models.Index(fields=['category', 'created_at', 'id'], condition=AVAILABLE_ITEMS,
+                         name='item_available_cat_idx'),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        item = super().from_db(db, field_names, values)
+        # Remembered so saving a move can retire the old category's catalog
+        # node without reading the row again (see app1.signals).
+        if 'category_id' in item.__dict__:
+            item._loaded_category_id = item.category_id
+        return item
+
 
 class Cart(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
@@ -48,6 +78,13 @@ class Address(models.Model):
     is_default = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        constraints = [
+            # Also the index checkout uses to find the default address.
+            models.UniqueConstraint(fields=['user'], condition=models.Q(is_default=True),
+                                    name='address_one_default_per_user'),
+        ]
+
     def __str__(self):
         return f"{self.address_line}, {self.city}"
 
@@ -58,7 +95,8 @@ class Order(models.Model):
         ('Delivered', 'Delivered'),
         ('Cancelled', 'Cancelled'),
     ]
-    order_status=models.CharField(max_length=20,choices=ORDER_STATUS_CHOICES,default="pending")
+    CANCELLABLE_STATUSES = ('Pending', 'Shipped')
+    order_status=models.CharField(max_length=20,choices=ORDER_STATUS_CHOICES,default="Pending")
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='orders')
     cart = models.ForeignKey('Cart', on_delete=models.CASCADE, related_name='orders')
@@ -67,6 +105,13 @@ class Order(models.Model):
     is_paid = models.BooleanField(default=False)
     created_at = models.DateTimeField(auto_now_add=True)
     discounted_amount = models.FloatField(default=0.0)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['user', 'created_at', 'id'], name='order_user_created_id_idx'),
+            models.Index(fields=['created_at', 'id'], name='order_created_at_id_idx'),
+        ]
+
     def __str__(self):
         return f"Order {self.id} by {self.user.username}"
 
@@ -79,6 +124,12 @@ class OrderItem(models.Model):
     line_total = models.FloatField()
     created_at = models.DateTimeField(auto_now_add=True)
 
+    class Meta:
+        indexes = [
+            # Covers the per-order quantity sum in the order history.
+            models.Index(fields=['order', 'quantity'], name='orderitem_order_quantity_idx'),
+        ]
+
     def __str__(self):
         return f"{self.item.description} x {self.quantity}"
     
\ No newline at end of file
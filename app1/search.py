@@ -0,0 +1,57 @@
+"""
+Ranked search over item descriptions.
+
+On PostgreSQL a query matches by full text (English stemming) or by trigram
+word similarity, so typos still find their item, and both are answered from
+GIN indexes. SQLite, used for dev and tests, has neither; there an FTS5
+index over app1_item, kept in sync by triggers, gives stemmed, prefix-matched
+full text ranked by bm25, without the fuzzy half.
+
+The indexes and the FTS5 table are created by migration
+0003_item_search_indexes, on the backend they belong to.
+"""
+import re
+
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector, TrigramWordSimilarity
+from django.db import connections
+from django.db.models import BooleanField, F, FloatField, Q
+from django.db.models.expressions import RawSQL
+
+SEARCH_CONFIG = 'english'
+FTS_TABLE = 'app1_item_fts'
+
+
+def fts5_query(text):
+    # Every word must match, as a prefix so half-typed words still find
+    # something. Quoting keeps FTS5 syntax in the input from being parsed.
+    words = re.findall(r'\w+', text)
+    return ' '.join(f'"{word}"*' for word in words)
+
+
+def search_items(queryset, text):
+    """Filter ``queryset`` to the items matching ``text``, best match first."""
+    vendor = connections[queryset.db].vendor
+    if vendor == 'postgresql':
+        query = SearchQuery(text, config=SEARCH_CONFIG, search_type='websearch')
+        return (
+            queryset
+            .alias(document=SearchVector('description', config=SEARCH_CONFIG))
+            .filter(Q(document=query) | Q(description__trigram_word_similar=text))
+            .annotate(rank=SearchRank(F('document'), query) + TrigramWordSimilarity(text, 'description'))
+            .order_by('-rank', 'id')
+        )
+
+    match = fts5_query(text)
+    if vendor != 'sqlite' or not match:
+        return queryset.filter(description__icontains=text.strip()).order_by('-created_at', 'id')
+    # The MATCH runs once for the filter; bm25 is only computed for the hits.
+    matches = RawSQL(
+        f'app1_item.rowid IN (SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s)',
+        (match,), output_field=BooleanField(),
+    )
+    rank = RawSQL(
+        f'SELECT -bm25({FTS_TABLE}) FROM {FTS_TABLE} '
+        f'WHERE {FTS_TABLE} MATCH %s AND {FTS_TABLE}.rowid = app1_item.rowid',
+        (match,), output_field=FloatField(),
+    )
+    return queryset.filter(matches).annotate(rank=rank).order_by('-rank', 'id')
@@ -7,6 +7,55 @@ class ItemSerializer(serializers.ModelSerializer):
         model = Item
         fields = "__all__"
 
+class ItemImportRowSerializer(serializers.Serializer):
+    sku = serializers.CharField(max_length=64)
+    category = serializers.CharField()
+    description = serializers.CharField(required=False, allow_blank=True, default='')
+    rate = serializers.FloatField(required=False, allow_null=True, min_value=0, default=None)
+    stock_count = serializers.IntegerField(required=False, min_value=0, default=0)
+    is_active = serializers.BooleanField(required=False, default=True)
+
+    def __init__(self, *args, categories=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.categories = categories or {}
+
+    def validate_category(self, value):
+        # Matches a category id or name against the importer's preloaded map.
+        category_id = self.categories.get(value.strip().lower())
+        if category_id is None:
+            raise serializers.ValidationError(f"Unknown category '{value}'.")
+        return category_id
+
+
+class ItemFilterSerializer(serializers.Serializer):
+    category = serializers.UUIDField(required=False)
+    min_rate = serializers.FloatField(required=False, min_value=0)
+    max_rate = serializers.FloatField(required=False, min_value=0)
+    owner = serializers.IntegerField(required=False)
+
+    def validate(self, data):
+        min_rate = data.get('min_rate')
+        max_rate = data.get('max_rate')
+        if min_rate is not None and max_rate is not None and min_rate > max_rate:
+            raise serializers.ValidationError({"max_rate": "max_rate must be greater than or equal to min_rate."})
+        return data
+
+    def filter_queryset(self, queryset):
+        data = self.validated_data
+        if 'category' in data:
+            queryset = queryset.filter(category_id=data['category'])
+        if 'min_rate' in data:
+            queryset = queryset.filter(rate__gte=data['min_rate'])
+        if 'max_rate' in data:
+            queryset = queryset.filter(rate__lte=data['max_rate'])
+        if 'owner' in data:
+            queryset = queryset.filter(user_id=data['owner'])
+        return queryset
+
+class ItemSearchSerializer(ItemFilterSerializer):
+    q = serializers.CharField(max_length=200)
+
+
 class CategorySerializer(serializers.ModelSerializer):
     items = ItemSerializer(many=True,read_only=True)
 
@@ -14,6 +63,13 @@ class CategorySerializer(serializers.ModelSerializer):
         model = Category
         fields = ["id", "name" , "is_active" , "items"]
 
+class CatalogCategorySerializer(serializers.ModelSerializer):
+    items = ItemSerializer(source="available_items", many=True, read_only=True)
+
+    class Meta:
+        model = Category
+        fields = ["id", "name", "is_active", "items"]
+
 class CartItemSerializer(serializers.ModelSerializer):
     item_details = serializers.SerializerMethodField()
 
@@ -36,6 +92,25 @@ class CartItemSerializer(serializers.ModelSerializer):
             "rate": obj.item.rate,
             "stock_count": obj.item.stock_count
         }
+
+
+class CartOperationSerializer(serializers.Serializer):
+    ACTIONS = ('add', 'set', 'remove')
+
+    action = serializers.ChoiceField(choices=ACTIONS)
+    item = serializers.UUIDField()
+    quantity = serializers.IntegerField(min_value=0, required=False, default=1)
+
+    def validate(self, data):
+        if data['action'] == 'add' and data['quantity'] < 1:
+            raise serializers.ValidationError({"quantity": "Add at least one unit."})
+        return data
+
+
+class CartBatchSerializer(serializers.Serializer):
+    operations = CartOperationSerializer(many=True, allow_empty=False, max_length=200)
+
+
 class AddressSerializer(serializers.ModelSerializer):
     class Meta:
         model = Address
@@ -58,4 +133,36 @@ class OrderSerializer(serializers.ModelSerializer):
     user=Userserializer
     class Meta:
         model = Order
-        fields = ['id', 'total_amount', 'user', 'order_status','order_items']
\ No newline at end of file
+        fields = ['id', 'total_amount', 'user', 'order_status','order_items']
+
+class OrderSummarySerializer(serializers.ModelSerializer):
+    item_count = serializers.IntegerField(read_only=True)
+
+    class Meta:
+        model = Order
+        fields = ['id', 'user', 'order_status', 'total_amount', 'discounted_amount', 'is_paid', 'item_count', 'created_at']
+
+class InvoiceExportFilterSerializer(serializers.Serializer):
+    date_from = serializers.DateField(required=False)
+    date_to = serializers.DateField(required=False)
+    order_status = serializers.ChoiceField(choices=Order.ORDER_STATUS_CHOICES, required=False)
+    user = serializers.IntegerField(required=False)
+
+    def validate(self, data):
+        date_from = data.get('date_from')
+        date_to = data.get('date_to')
+        if date_from and date_to and date_from > date_to:
+            raise serializers.ValidationError({"date_to": "date_to must be after or equal to date_from."})
+        return data
+
+    def filter_queryset(self, queryset):
+        data = self.validated_data
+        if 'date_from' in data:
+            queryset = queryset.filter(created_at__date__gte=data['date_from'])
+        if 'date_to' in data:
+            queryset = queryset.filter(created_at__date__lte=data['date_to'])
+        if 'order_status' in data:
+            queryset = queryset.filter(order_status=data['order_status'])
+        if 'user' in data:
+            queryset = queryset.filter(user_id=data['user'])
+        return queryset
@@ -0,0 +1,35 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from demo.cache import invalidate_on_change
+
+from .catalog import invalidate_categories
+from .models import Category, Item
+
+invalidate_on_change(Item, Category)
+
+
+@receiver(pre_save, sender=Item)
+def remember_item_category(sender, instance, **kwargs):
+    if instance._state.adding:
+        instance._previous_category_id = None
+    elif hasattr(instance, '_loaded_category_id'):
+        instance._previous_category_id = instance._loaded_category_id
+    else:
+        # Built by hand rather than loaded, so only the row knows.
+        instance._previous_category_id = (
+            Item.objects.filter(pk=instance.pk).values_list('category_id', flat=True).first()
+        )
+
+
+@receiver(post_save, sender=Item)
+@receiver(post_delete, sender=Item)
+def invalidate_item_category(sender, instance, **kwargs):
+    invalidate_categories([instance.category_id, getattr(instance, '_previous_category_id', None)])
+    instance._loaded_category_id = instance.category_id
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def invalidate_category(sender, instance, **kwargs):
+    invalidate_categories([instance.pk], structure=True)
@@ -0,0 +1,98 @@
+from django.db import transaction
+from django.db.models import Case, F, Q, Sum, When
+
+from demo.cache import bump_generation
+from reports.rollups import record_cancellation
+
+from .catalog import invalidate_categories
+from .models import Item, Order
+
+
+class InsufficientStock(Exception):
+    def __init__(self, item=None):
+        self.item = item
+        super().__init__(item)
+
+    @property
+    def message(self):
+        if self.item is None:
+            return "Not enough stock."
+        return f"Not enough stock for {self.item.description}."
+
+
+def catalog_changed(category_ids):
+    # Bulk writes bypass post_save, so the read caches are retired by hand.
+    transaction.on_commit(lambda: bump_generation(Item))
+    invalidate_categories(category_ids)
+
+
+def reserve_stock(quantities):
+    """
+    Take ``quantities`` ({item_id: quantity}) out of stock in one statement.
+
+    Must run inside ``transaction.atomic``. Rows are locked in primary key
+    order so concurrent checkouts over overlapping carts can't deadlock, and
+    the decrement is conditional on the stock still being there so backends
+    without row locks can't oversell either. Returns the locked items keyed
+    by id.
+    """
+    items = {
+        item.pk: item
+        for item in Item.objects.select_for_update().filter(pk__in=quantities).order_by('pk')
+    }
+    if len(items) != len(quantities):
+        raise InsufficientStock()
+    for item_id, item in items.items():
+        if item.stock_count < quantities[item_id]:
+            raise InsufficientStock(item)
+
+    available = Q()
+    decrements = []
+    for item_id, quantity in quantities.items():
+        available |= Q(pk=item_id, stock_count__gte=quantity)
+        decrements.append(When(pk=item_id, then=F('stock_count') - quantity))
+    updated = Item.objects.filter(available).update(stock_count=Case(*decrements))
+    if updated != len(quantities):
+        raise InsufficientStock()
+
+    for item_id, item in items.items():
+        item.stock_count -= quantities[item_id]
+    catalog_changed([item.category_id for item in items.values()])
+    return items
+
+
+def release_order_stock(order):
+    """
+    Cancel ``order`` and put its items back in stock, at most once.
+
+    Must run inside ``transaction.atomic``. The status flip is conditional, so
+    of two racing cancel requests only one restocks and books the cancellation
+    in the sales rollups; the other gets False.
+    """
+    cancelled = (
+        Order.objects
+        .filter(pk=order.pk, order_status__in=Order.CANCELLABLE_STATUSES)
+        .update(order_status='Cancelled')
+    )
+    if not cancelled:
+        return False
+    order.order_status = 'Cancelled'
+
+    lines = list(
+        order.order_items.values('item_id')
+        .annotate(quantity=Sum('quantity'), line_total=Sum('line_total'))
+        .values_list('item_id', 'quantity', 'line_total')
+    )
+    if lines:
+        categories = dict(
+            Item.objects.select_for_update().filter(pk__in=[item_id for item_id, _, _ in lines]).order_by('pk')
+            .values_list('pk', 'category_id')
+        )
+        Item.objects.filter(pk__in=categories).update(stock_count=Case(*[
+            When(pk=item_id, then=F('stock_count') + quantity) for item_id, quantity, _ in lines
+        ]))
+        catalog_changed(categories.values())
+        record_cancellation(order, [
+            (item_id, categories[item_id], quantity, line_total) for item_id, quantity, line_total in lines
+        ])
+    return True
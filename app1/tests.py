@@ -1,3 +1,772 @@
-from django.test import TestCase
+import importlib
+import io
+import json
+import threading
+import time
+import uuid
+import zipfile
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import async_to_sync
+from django.apps import apps
+from django.contrib.auth.models import User
+from django.core.cache import cache, caches
+from django.db import DatabaseError, IntegrityError, connection, transaction
+from django.db.models import QuerySet
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient, APITransactionTestCase
+
+from demo.cache import bump_generation, cached_read, check_shared_read_cache, get_cache, make_key
+from demo.routers import pin_key, replica_health
+from demo.testing import QueryBudgetTestCase
+from discounts.models import Coupon
+
+from . import catalog
+from .catalog import category_node_keys
+from .invoices import get_render_pool
+from .models import Address, Cart, CartItem, Category, Item, Order, OrderItem
+
+
+def create_buyer(username, items):
+    user = User.objects.create_user(username=username, password='secret')
+    Address.objects.create(
+        user=user, address_line='1 Main St', city='Pune', state='MH',
+        postal_code='411001', country='India', is_default=True,
+    )
+    cart = Cart.objects.create(user=user)
+    for item, quantity in items:
+        CartItem.objects.create(cart=cart, item=item, quantity=quantity)
+    return user
+
+
+class CheckoutTests(TestCase):
+    def setUp(self):
+        self.category = Category.objects.create(name='Books')
+        self.book = Item.objects.create(category=self.category, description='Book', rate=100, stock_count=5)
+        self.pen = Item.objects.create(category=self.category, description='Pen', rate=10, stock_count=1)
+        self.client = APIClient()
+
+    def test_checkout_reserves_stock_and_clears_cart(self):
+        user = create_buyer('buyer', [(self.book, 2), (self.pen, 1)])
+        self.client.force_authenticate(user)
+
+        response = self.client.post('/api/order/', {}, format='json')
+
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['final_amount'], 210)
+        self.book.refresh_from_db()
+        self.pen.refresh_from_db()
+        self.assertEqual((self.book.stock_count, self.pen.stock_count), (3, 0))
+        self.assertEqual(OrderItem.objects.filter(order__user=user).count(), 2)
+        self.assertFalse(CartItem.objects.filter(cart__user=user).exists())
+
+    def test_checkout_is_all_or_nothing(self):
+        user = create_buyer('buyer', [(self.book, 2), (self.pen, 3)])
+        self.client.force_authenticate(user)
+
+        response = self.client.post('/api/order/', {}, format='json')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['error'], 'Not enough stock for Pen.')
+        self.book.refresh_from_db()
+        self.assertEqual(self.book.stock_count, 5)
+        self.assertFalse(Order.objects.exists())
+        self.assertEqual(CartItem.objects.filter(cart__user=user).count(), 2)
+
+    def test_checkout_rolls_back_when_coupon_limit_is_reached(self):
+        now = timezone.now()
+        Coupon.objects.create(code='ONCE', discount_percent=10, usage_limit=1,
+                              valid_from=now - timedelta(days=1), valid_to=now + timedelta(days=1))
+        first = create_buyer('first', [(self.book, 1)])
+        second = create_buyer('second', [(self.book, 1)])
+
+        self.client.force_authenticate(first)
+        self.assertEqual(self.client.post('/api/order/', {'coupon_code': 'ONCE'}, format='json').status_code, 201)
+        self.client.force_authenticate(second)
+        response = self.client.post('/api/order/', {'coupon_code': 'ONCE'}, format='json')
+
+        self.assertEqual(response.status_code, 400)
+        self.book.refresh_from_db()
+        self.assertEqual(self.book.stock_count, 4)
+        self.assertEqual(Order.objects.count(), 1)
+        self.assertEqual(CartItem.objects.filter(cart__user=second).count(), 1)
+
+
+class CancellationTests(TestCase):
+    def setUp(self):
+        category = Category.objects.create(name='Books')
+        self.book = Item.objects.create(category=category, description='Book', rate=100, stock_count=5)
+        self.user = create_buyer('buyer', [(self.book, 2)])
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.client.post('/api/order/', {}, format='json')
+        self.order = Order.objects.get(user=self.user)
+
+    def test_cancel_restocks_order_items_once(self):
+        first = self.client.patch(f'/api/order/{self.order.pk}/', {'order_status': 'Cancelled'}, format='json')
+        second = self.client.patch(f'/api/order/{self.order.pk}/', {'order_status': 'Cancelled'}, format='json')
+
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(second.status_code, 400)
+        self.book.refresh_from_db()
+        self.assertEqual(self.book.stock_count, 5)
+
+    def test_invalid_cancel_request_keeps_stock(self):
+        response = self.client.patch(
+            f'/api/order/{self.order.pk}/', {'order_status': 'Cancelled', 'total_amount': 'abc'}, format='json',
+        )
+
+        self.assertEqual(response.status_code, 400)
+        self.book.refresh_from_db()
+        self.order.refresh_from_db()
+        self.assertEqual((self.book.stock_count, self.order.order_status), (3, 'Pending'))
+
+    def test_legacy_pending_orders_can_be_cancelled_after_migration(self):
+        migration = importlib.import_module('app1.migrations.0002_normalize_pending_orders')
+        Order.objects.filter(pk=self.order.pk).update(order_status='pending')
+
+        migration.normalize_pending_orders(apps, connection.schema_editor())
+        response = self.client.patch(f'/api/order/{self.order.pk}/', {'order_status': 'Cancelled'}, format='json')
+
+        self.assertEqual(response.status_code, 200)
+        self.book.refresh_from_db()
+        self.assertEqual(self.book.stock_count, 5)
+
+
+class CheckoutConcurrencyTests(TransactionTestCase):
+    buyers = 12
+    stock = 5
+
+    def test_parallel_checkouts_never_oversell(self):
+        category = Category.objects.create(name='Hot')
+        item = Item.objects.create(category=category, description='Hot SKU', rate=10, stock_count=self.stock)
+        users = [create_buyer(f'buyer{i}', [(item, 1)]) for i in range(self.buyers)]
+
+        start = threading.Barrier(self.buyers)
+        statuses = []
+
+        def checkout(user):
+            client = APIClient()
+            client.force_authenticate(user)
+            try:
+                start.wait()
+                statuses.append(client.post('/api/order/', {}, format='json').status_code)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=checkout, args=(user,)) for user in users]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        item.refresh_from_db()
+        self.assertEqual(sorted(statuses), [201] * self.stock + [400] * (self.buyers - self.stock))
+        self.assertEqual(item.stock_count, 0)
+        self.assertEqual(OrderItem.objects.filter(item=item).count(), self.stock)
+
+
+class ItemImportTests(QueryBudgetTestCase):
+    def setUp(self):
+        super().setUp()
+        self.admin = User.objects.create_superuser(username='admin', password='secret')
+        self.books = Category.objects.create(name='Books')
+        self.pens = Category.objects.create(name='Pens')
+        self.existing = Item.objects.create(category=self.books, sku='BK-1', description='Old', rate=5, stock_count=1)
+        self.authenticate(self.admin)
+
+    def test_csv_import_upserts_in_bulk_and_reports_bad_rows(self):
+        rows = ['sku,category,description,rate,stock_count']
+        rows += [f'PN-{i},pens,Pen {i},{i + 1},{i}' for i in range(40)]
+        rows += [
+            f'BK-1,{self.pens.pk},New,7.5,3',
+            'BK-2,Magazines,Unknown category,1,1',
+            'BK-3,Books,Negative stock,1,-4',
+            ',Books,No sku,1,1',
+        ]
+        with self.assertMaxQueries(6):
+            response = self.client.generic('POST', '/api/items/import/', '\n'.join(rows), content_type='text/csv')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual((response.data['created'], response.data['updated'], response.data['failed']), (40, 1, 3))
+        self.assertEqual([error['line'] for error in response.data['errors']], [43, 44, 45])
+        self.existing.refresh_from_db()
+        self.assertEqual((self.existing.category_id, self.existing.description, self.existing.stock_count),
+                         (self.pens.pk, 'New', 3))
+        self.assertEqual(Item.objects.filter(category=self.pens, user=self.admin).count(), 40)
+
+    def test_jsonl_import(self):
+        body = '\n'.join([
+            '{"sku": "BK-9", "category": "Books", "rate": 12}',
+            'not json',
+            '{"sku": "BK-9", "category": "Books", "rate": 15}',
+        ])
+        response = self.client.generic('POST', '/api/items/import/', body, content_type='application/x-ndjson')
+
+        self.assertEqual((response.data['created'], response.data['failed']), (1, 1))
+        self.assertEqual(Item.objects.get(sku='BK-9').rate, 15)
+
+    def test_failed_chunk_is_retried_row_by_row(self):
+        bulk_create = QuerySet.bulk_create
+
+        def reject_bad_sku(queryset, objs, *args, **kwargs):
+            if any(obj.sku == 'PN-BAD' for obj in objs):
+                raise DatabaseError('value out of range')
+            return bulk_create(queryset, objs, *args, **kwargs)
+
+        rows = ['sku,category,description,rate,stock_count', 'BK-1,Books,Renamed,5,1']
+        rows += [f'PN-{i},pens,Pen {i},1,1' for i in range(3)] + ['PN-BAD,pens,Bad,1,1', 'PN-3,pens,Pen 3,1,1']
+        with mock.patch.object(QuerySet, 'bulk_create', autospec=True, side_effect=reject_bad_sku):
+            response = self.client.generic('POST', '/api/items/import/', '\n'.join(rows), content_type='text/csv')
+
+        self.assertEqual((response.data['created'], response.data['updated'], response.data['failed']), (4, 1, 1))
+        self.assertEqual([(error['line'], error['sku']) for error in response.data['errors']], [(6, 'PN-BAD')])
+        self.assertEqual(Item.objects.filter(sku__startswith='PN-').count(), 4)
+
+    def test_import_is_for_superusers_only(self):
+        self.authenticate(User.objects.create_user(username='buyer', password='secret'))
+        response = self.client.generic('POST', '/api/items/import/', 'sku,category', content_type='text/csv')
+        self.assertEqual(response.status_code, 403)
+
+
+class ItemSearchTests(QueryBudgetTestCase):
+    def setUp(self):
+        super().setUp()
+        self.books = Category.objects.create(name='Books')
+        self.pens = Category.objects.create(name='Pens')
+        self.notebook = Item.objects.create(category=self.books, description='Ruled notebook, 200 pages', rate=80, stock_count=5)
+        self.notebooks = Item.objects.create(category=self.books, description='Notebook notebook bundle', rate=300, stock_count=5)
+        self.pen = Item.objects.create(category=self.pens, description='Gel pen for notebooks', rate=20, stock_count=5)
+        Item.objects.create(category=self.pens, description='Sold out notebook', rate=10, stock_count=0)
+
+    def search(self, **params):
+        response = self.client.get('/api/items/search/', params)
+        self.assertEqual(response.status_code, 200)
+        return [row['id'] for row in response.data['results']]
+
+    def test_search_ranks_stems_and_filters(self):
+        with self.assertMaxQueries(1):
+            ids = self.search(q='notebooks')
+        self.assertEqual(ids[0], str(self.notebooks.pk))
+        self.assertEqual(set(ids), {str(self.notebook.pk), str(self.notebooks.pk), str(self.pen.pk)})
+
+        self.assertEqual(self.search(q='noteb', category=str(self.pens.pk)), [str(self.pen.pk)])
+        self.assertEqual(self.search(q='notebook', max_rate=100, min_rate=50), [str(self.notebook.pk)])
+        self.assertEqual(self.search(q='"ruled" (pages*'), [str(self.notebook.pk)])
+
+    def test_search_is_answered_from_the_fts_index(self):
+        if connection.vendor != 'sqlite':
+            self.skipTest('FTS5 is the SQLite search index.')
+        with self.assertQueriesUseIndexes() as queries:
+            self.search(q='notebooks')
+        with connection.cursor() as cursor:
+            cursor.execute(f'EXPLAIN QUERY PLAN {queries.captured_queries[-1]["sql"]}')
+            plan = [row[3] for row in cursor.fetchall()]
+        self.assertTrue(any(detail.startswith('SCAN app1_item_fts VIRTUAL TABLE INDEX') for detail in plan), plan)
+
+    def test_search_follows_item_changes_and_paginates(self):
+        Item.objects.filter(pk=self.pen.pk).update(description='Fountain pen')
+        self.notebook.delete()
+        self.assertEqual(self.search(q='notebook'), [str(self.notebooks.pk)])
+
+        response = self.client.get('/api/items/search/', {'q': 'pen', 'page_size': 1})
+        self.assertEqual(len(response.data['results']), 1)
+        self.assertIsNone(response.data['next'])
+        self.assertEqual(self.client.get('/api/items/search/').status_code, 400)
+
+
+class KeysetPaginationTests(QueryBudgetTestCase):
+    def setUp(self):
+        super().setUp()
+        category = Category.objects.create(name='Books')
+        self.items = [
+            Item.objects.create(category=category, description=f'Item {i}', rate=10, stock_count=1)
+            for i in range(5)
+        ]
+        # Two rows on the same instant, so the id tie-break is exercised.
+        Item.objects.filter(pk__in=[item.pk for item in self.items[1:3]]).update(created_at=self.items[1].created_at)
+        Item.objects.filter(pk=self.items[4].pk).update(created_at=None)
+
+    def test_next_cursor_walks_every_dated_row_once(self):
+        expected = [
+            str(pk) for pk in Item.objects.filter(created_at__isnull=False)
+            .order_by('-created_at', '-id').values_list('pk', flat=True)
+        ]
+        seen = []
+        url = '/api/items/?page_size=2'
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            seen += [row['id'] for row in response.data['results']]
+            url = response.data['next']
+        self.assertEqual(seen, expected)
+
+        response = self.client.get('/api/items/', {'page_size': 10})
+        self.assertEqual([row['id'] for row in response.data['results']], expected)
+
+    def test_malformed_cursor_is_not_found(self):
+        for cursor in ['not-base64!', 'bm8tc2VwYXJhdG9y', 'eHx5fHo=']:
+            self.assertEqual(self.client.get('/api/items/', {'cursor': cursor}).status_code, 404)
+
+
+class CatalogTreeInvalidationTests(QueryBudgetTestCase):
+    def setUp(self):
+        super().setUp()
+        self.books, self.pens, self.toys = [Category.objects.create(name=name) for name in ['Books', 'Pens', 'Toys']]
+        self.book = Item.objects.create(category=self.books, description='Book', rate=10, stock_count=5)
+        Item.objects.create(category=self.pens, description='Pen', rate=1, stock_count=5)
+        self.assertEqual(self.client.get('/api/categoryAPI/tree/').status_code, 200)
+        self.book = Item.objects.get(pk=self.book.pk)
+
+    def cached_nodes(self):
+        categories = {'books': self.books, 'pens': self.pens, 'toys': self.toys}
+        keys = category_node_keys([str(category.pk) for category in categories.values()])
+        return {name for name, category in categories.items() if cache.get(keys[str(category.pk)]) is not None}
+
+    def stock(self, response):
+        return {item['description']: item['stock_count'] for node in response.data for item in node['items']}
+
+    def test_stock_change_retires_only_its_category_without_reading_the_row(self):
+        self.book.stock_count = 4
+        with self.captureOnCommitCallbacks(execute=True), self.assertMaxQueries(1):
+            self.book.save()
+        self.assertEqual(self.cached_nodes(), {'pens', 'toys'})
+
+    def test_new_item_retires_only_its_category(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Item.objects.create(category=self.toys, description='Kite', rate=5, stock_count=1)
+        self.assertEqual(self.cached_nodes(), {'books', 'pens'})
+
+    def test_moved_item_retires_old_and_new_category(self):
+        self.book.category = self.toys
+        with self.captureOnCommitCallbacks(execute=True), self.assertMaxQueries(1):
+            self.book.save()
+        self.assertEqual(self.cached_nodes(), {'pens'})
+
+        self.client.get('/api/categoryAPI/tree/')
+        self.book.category = self.pens
+        with self.captureOnCommitCallbacks(execute=True):
+            self.book.save()
+        self.assertEqual(self.cached_nodes(), {'books'})
+
+    def test_rebuild_racing_a_change_is_not_served(self):
+        build = catalog.build_category_nodes
+        self.book.stock_count = 4
+        with self.captureOnCommitCallbacks(execute=True):
+            self.book.save()
+
+        def build_then_lose_the_race(category_ids):
+            nodes = build(category_ids)
+            # The change commits after the rows were read, before the write.
+            self.book.stock_count = 3
+            with self.captureOnCommitCallbacks(execute=True):
+                self.book.save()
+            return nodes
+
+        with mock.patch.object(catalog, 'build_category_nodes', build_then_lose_the_race):
+            stale = self.client.get('/api/categoryAPI/tree/')
+        fresh = self.client.get('/api/categoryAPI/tree/')
+
+        self.assertEqual(self.stock(stale)['Book'], 4)
+        self.assertEqual(self.stock(fresh)['Book'], 3)
+
+
+class ReadCacheTests(QueryBudgetTestCase):
+    def setUp(self):
+        super().setUp()
+        self.category = Category.objects.create(name='Books')
+        self.builds = 0
+
+    def build(self):
+        self.builds += 1
+        return self.builds
+
+    def test_saving_a_model_retires_its_cached_reads(self):
+        Item.objects.create(category=self.category, description='Old', rate=10, stock_count=1)
+        self.assertEqual(len(self.client.get('/api/items/').data['results']), 1)
+        with self.captureOnCommitCallbacks(execute=True):
+            Item.objects.create(category=self.category, description='New', rate=10, stock_count=1)
+        self.assertEqual(len(self.client.get('/api/items/').data['results']), 2)
+
+        self.assertEqual(cached_read('test', [Item], self.build), 1)
+        self.assertEqual(cached_read('test', [Item], self.build), 1)
+        bump_generation(Item)
+        self.assertEqual(cached_read('test', [Item], self.build), 2)
+
+    def test_stale_entry_is_served_while_another_worker_rebuilds(self):
+        cached_read('test', [Item], self.build, timeout=0)
+        lock_key = f'lock:{make_key("test", [Item])}'
+        get_cache().add(lock_key, 1)
+        self.assertEqual(cached_read('test', [Item], self.build), 1)
+        self.assertEqual(self.builds, 1)
+
+        get_cache().delete(lock_key)
+        self.assertEqual(cached_read('test', [Item], self.build), 2)
+
+    @override_settings(READ_CACHE_LOCK_WAIT=5)
+    def test_cold_miss_waits_for_the_rebuilding_worker(self):
+        key = make_key('test', [Item])
+        get_cache().add(f'lock:{key}', 1)
+        winner = threading.Timer(0.1, lambda: get_cache().set(key, (time.time() + 60, 'built elsewhere')))
+        winner.start()
+        self.assertEqual(cached_read('test', [Item], self.build), 'built elsewhere')
+        winner.join()
+        self.assertEqual(self.builds, 0)
+
+    def test_process_local_cache_fails_the_checks(self):
+        with override_settings(SINGLE_PROCESS=False):
+            self.assertEqual([error.id for error in check_shared_read_cache(None)], ['demo.E001'])
+            file_cache = {'default': {'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache', 'LOCATION': '/tmp'}}
+            with override_settings(CACHES=file_cache):
+                self.assertEqual(check_shared_read_cache(None), [])
+
+
+SEPARATE_CACHES = {
+    alias: {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': alias}
+    for alias in ['default', 'shared']
+}
+
+
+@override_settings(DATABASE_REPLICAS=['replica'])
+class ReplicaRoutingTests(APITransactionTestCase):
+    # The replica is a separate, empty database: rows only show up in a
+    # response when it was read from the primary. Reads inside a transaction
+    # always go to the primary, hence no TestCase.
+    databases = {'default', 'replica'}
+    authenticate = QueryBudgetTestCase.authenticate
+
+    def setUp(self):
+        cache.clear()
+        replica_health.reset()
+        category = Category.objects.create(name='Books')
+        self.item = Item.objects.create(category=category, description='Book', rate=100, stock_count=5)
+        self.user = create_buyer('buyer', [(self.item, 1)])
+        self.authenticate(self.user)
+        self.assertEqual(self.client.post('/api/order/', {}, format='json').status_code, 201)
+
+    def order_count(self):
+        response = self.client.get('/api/order/')
+        self.assertEqual(response.status_code, 200)
+        return len(response.data)
+
+    def test_reads_stick_to_primary_after_a_write(self):
+        self.assertEqual(self.order_count(), 1)
+
+        cache.delete(pin_key(self.user.pk))
+        self.assertEqual(self.order_count(), 0)
+        headers = {'Authorization': self.client._credentials['HTTP_AUTHORIZATION']}
+        response = async_to_sync(self.async_client.get)('/api/async/order/', headers=headers)
+        self.assertEqual(response.json(), [])
+
+    @override_settings(CACHES=SEPARATE_CACHES, READ_CACHE_ALIAS='shared')
+    def test_pins_are_kept_in_the_shared_read_cache(self):
+        self.client.post('/api/order/', {}, format='json')
+        self.assertIsNone(caches['default'].get(pin_key(self.user.pk)))
+        self.assertEqual(self.order_count(), 1)
+        caches['shared'].delete(pin_key(self.user.pk))
+        self.assertEqual(self.order_count(), 0)
+
+    def test_lagging_or_unreachable_replicas_are_skipped(self):
+        cache.delete(pin_key(self.user.pk))
+        with mock.patch('demo.routers.replica_lag', return_value=30):
+            self.assertEqual(self.order_count(), 1)
+        with mock.patch('demo.routers.replica_lag', side_effect=DatabaseError):
+            replica_health.reset()
+            self.assertEqual(self.order_count(), 1)
+
+    def test_streamed_reads_stay_on_the_replica(self):
+        self.authenticate(User.objects.create_superuser(username='admin', password='secret'))
+        response = self.client.get('/api/order/')
+        self.assertEqual(json.loads(b''.join(response.streaming_content)), [])
+
+    def test_cached_reads_are_built_from_primary(self):
+        self.client.credentials()
+        response = self.client.get('/api/items/')
+        self.assertEqual([row['id'] for row in response.data['results']], [str(self.item.pk)])
+
+
+@override_settings(QUERY_INSTRUMENTATION=True)
+class QueryInstrumentationTests(TestCase):
+    def test_query_headers(self):
+        category = Category.objects.create(name='Books')
+        Item.objects.create(category=category, description='Book', rate=100, stock_count=5)
+
+        response = APIClient().get('/api/categoryAPI/')
+
+        self.assertEqual(response['X-Query-Count'], '2')
+        self.assertEqual(response['X-Query-Duplicates'], '0')
+        self.assertIn('X-Query-Time-Ms', response)
+
+    def test_query_headers_on_async_endpoint(self):
+        cache.clear()
+        category = Category.objects.create(name='Books')
+        Item.objects.create(category=category, description='Book', rate=100, stock_count=5)
+
+        response = async_to_sync(self.async_client.get)('/api/async/categoryAPI/')
+
+        self.assertEqual(response['X-Query-Count'], '2')
+        self.assertEqual(response['X-Query-Duplicates'], '0')
+        self.assertGreater(float(response['X-Query-Time-Ms']), 0)
+
+
+class EndpointQueryBudgetTests(QueryBudgetTestCase):
+    def setUp(self):
+        super().setUp()
+        self.admin = User.objects.create_superuser(username='admin', password='secret')
+        self.category = Category.objects.create(name='Books', user=self.admin)
+        self.other_category = Category.objects.create(name='Pens', user=self.admin)
+        self.items = [
+            Item.objects.create(category=category, user=self.admin, description=f'Item {i}', rate=10 * (i + 1), stock_count=10)
+            for i, category in enumerate([self.category, self.category, self.other_category, self.other_category])
+        ]
+        self.user = create_buyer('buyer', [(item, 1) for item in self.items[:3]])
+        self.address = self.user.addresses.get()
+        self.authenticate(self.user)
+
+    def place_order(self):
+        self.client.post('/api/order/', {}, format='json')
+        return Order.objects.get(user=self.user)
+
+    def test_item_list(self):
+        self.client.credentials()
+        with self.assertMaxQueries(1):
+            response = self.client.get('/api/items/', {'category': self.category.pk})
+        self.assertEqual(len(response.data['results']), 2)
+        with self.assertMaxQueries(0):
+            self.client.get('/api/items/', {'category': self.category.pk})
+
+    def test_item_create_update_delete(self):
+        with self.assertMaxQueries(2):
+            response = self.client.post('/api/items/', {
+                'category': str(self.category.pk), 'description': 'New', 'rate': 5, 'stock_count': 0,
+            }, format='json')
+        self.assertEqual(response.status_code, 201)
+        with self.assertMaxQueries(3):
+            response = self.client.patch(f'/api/items/{response.data["id"]}/', {'rate': 6}, format='json')
+        self.assertEqual(response.status_code, 200)
+        with self.assertMaxQueries(4):
+            response = self.client.delete(f'/api/items/{response.data["id"]}/')
+        self.assertEqual(response.status_code, 200)
+
+    def test_category_list(self):
+        self.client.credentials()
+        with self.assertMaxQueries(2):
+            response = self.client.get('/api/categoryAPI/')
+        self.assertEqual(len(response.data), 2)
+
+    def test_category_create_update_delete(self):
+        with self.assertMaxQueries(2):
+            response = self.client.post('/api/categoryAPI/', {'name': 'Toys'}, format='json')
+        self.assertEqual(response.status_code, 201)
+        with self.assertMaxQueries(3):
+            response = self.client.patch(f'/api/categoryAPI/{response.data["id"]}/', {'name': 'Games'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        with self.assertMaxQueries(4):
+            response = self.client.delete(f'/api/categoryAPI/{response.data["id"]}/')
+        self.assertEqual(response.status_code, 200)
+
+    def test_catalog_tree(self):
+        self.client.credentials()
+        with self.assertMaxQueries(3):
+            response = self.client.get('/api/categoryAPI/tree/')
+        self.assertEqual([len(node['items']) for node in response.data], [2, 2])
+
+    def test_cache_metrics(self):
+        self.authenticate(self.admin)
+        with self.assertMaxQueries(0):
+            response = self.client.get('/api/cache/metrics/')
+        self.assertEqual(response.status_code, 200)
+
+    def test_cart_get(self):
+        with self.assertMaxQueries(2):
+            response = self.client.get('/api/cart/')
+        self.assertEqual(len(response.data), 3)
+
+    def test_cart_dump_for_superuser(self):
+        self.authenticate(self.admin)
+        with self.assertMaxQueries(1):
+            response = self.consume(self.client.get('/api/cart/'))
+        self.assertEqual(response.status_code, 200)
+
+    def test_cart_add_update_remove(self):
+        with self.assertMaxQueries(7):
+            response = self.client.post('/api/cart/', {'item': str(self.items[3].pk)}, format='json')
+        self.assertEqual(response.status_code, 200)
+        with self.assertMaxQueries(2):
+            response = self.client.patch(f'/api/cart/items/{response.data["id"]}/', {'quantity': 2}, format='json')
+        self.assertEqual(response.status_code, 200)
+        with self.assertMaxQueries(2):
+            response = self.client.delete(f'/api/cart/items/{response.data["id"]}/')
+        self.assertEqual(response.status_code, 200)
+
+    def test_cart_batch(self):
+        operations = [
+            {'action': 'add', 'item': str(self.items[3].pk), 'quantity': 2},
+            {'action': 'set', 'item': str(self.items[0].pk), 'quantity': 4},
+            {'action': 'remove', 'item': str(self.items[1].pk)},
+            {'action': 'add', 'item': str(self.items[2].pk)},
+        ]
+        with self.assertMaxQueries(8):
+            response = self.client.post('/api/cart/batch/', {'operations': operations}, format='json')
+
+        self.assertEqual(response.status_code, 200)
+        quantities = {row['item']: row['quantity'] for row in response.data}
+        self.assertEqual(quantities, {self.items[0].pk: 4, self.items[2].pk: 2, self.items[3].pk: 2})
+        self.assertEqual(dict(CartItem.objects.filter(cart__user=self.user).values_list('item', 'quantity')), quantities)
+
+    def test_cart_batch_is_all_or_nothing(self):
+        operations = [
+            {'action': 'add', 'item': str(self.items[3].pk)},
+            {'action': 'set', 'item': str(self.items[0].pk), 'quantity': 11},
+            {'action': 'add', 'item': str(self.category.pk)},
+        ]
+        response = self.client.post('/api/cart/batch/', {'operations': operations}, format='json')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual([error['index'] for error in response.data['errors']], [1, 2])
+        self.assertEqual(CartItem.objects.filter(cart__user=self.user).count(), 3)
+
+    def test_address_endpoints(self):
+        with self.assertMaxQueries(1):
+            response = self.client.get('/api/address/')
+        self.assertEqual(len(response.data), 1)
+        with self.assertMaxQueries(1):
+            response = self.client.post('/api/address/', {
+                'address_line': '2 Side St', 'city': 'Pune', 'state': 'MH', 'postal_code': '411002', 'country': 'India',
+            }, format='json')
+        self.assertEqual(response.status_code, 201)
+        with self.assertMaxQueries(5):
+            response = self.client.patch(f'/api/address/{response.data["id"]}/', {'is_default': True}, format='json')
+        self.assertEqual(response.status_code, 200)
+        with self.assertMaxQueries(3):
+            response = self.client.delete(f'/api/address/{response.data["id"]}/')
+        self.assertEqual(response.status_code, 200)
+
+    def test_checkout(self):
+        with self.assertMaxQueries(12):
+            response = self.client.post('/api/order/', {}, format='json')
+        self.assertEqual(response.status_code, 201)
+
+    def test_order_list(self):
+        self.place_order()
+        with self.assertMaxQueries(3):
+            response = self.client.get('/api/order/')
+        self.assertEqual(len(response.data[0]['order_items']), 3)
+
+    def test_order_history_and_detail(self):
+        order = self.place_order()
+        with self.assertMaxQueries(1):
+            response = self.client.get('/api/order/history/', {'page_size': 1})
+        self.assertEqual(len(response.data['results']), 1)
+        summary = response.data['results'][0]
+        self.assertEqual((summary['id'], summary['item_count'], summary['total_amount']), (str(order.pk), 3, 60))
+        self.assertNotIn('order_items', summary)
+
+        with self.assertMaxQueries(3):
+            response = self.client.get(f'/api/order/{order.pk}/')
+        self.assertEqual(len(response.data['order_items']), 3)
+
+        self.authenticate(create_buyer('other', []))
+        self.assertEqual(self.client.get(f'/api/order/{order.pk}/').status_code, 404)
+        self.assertEqual(self.client.get('/api/order/history/').data['results'], [])
+
+    def test_order_dump_for_superuser(self):
+        self.place_order()
+        self.authenticate(self.admin)
+        with self.assertMaxQueries(3):
+            response = self.consume(self.client.get('/api/order/'))
+        self.assertEqual(response.status_code, 200)
+
+    def test_order_cancel_and_delete(self):
+        order = self.place_order()
+        with self.assertMaxQueries(12):
+            response = self.client.patch(f'/api/order/{order.pk}/', {'order_status': 'Cancelled'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        with self.assertMaxQueries(3):
+            response = self.client.delete(f'/api/order/{order.pk}/')
+        self.assertEqual(response.status_code, 204)
+
+    def test_invoice(self):
+        order = self.place_order()
+        with self.assertMaxQueries(2):
+            response = self.client.get(f'/api/order/{order.pk}/invoice/')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(b''.join(response.streaming_content).startswith(b'%PDF'))
+
+        with self.assertMaxQueries(2):
+            response = self.client.get(f'/api/order/{order.pk}/invoice/', HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+
+    def test_invoice_export(self):
+        self.place_order()
+        self.authenticate(self.admin)
+        with self.assertMaxQueries(4):
+            response = self.client.get('/api/invoices/export/', {'order_status': 'Pending'})
+            archive = zipfile.ZipFile(io.BytesIO(b''.join(response.streaming_content)))
+        self.assertEqual(len(archive.namelist()), 1)
+
+    def test_invoice_exports_share_one_render_pool(self):
+        self.place_order()
+        self.authenticate(self.admin)
+        pool = get_render_pool()
+        self.consume(self.client.get('/api/invoices/export/'))
+        self.assertIs(get_render_pool(), pool)
+        with override_settings(INVOICE_RENDER_WORKERS=1):
+            self.assertIsNot(get_render_pool(), pool)
+            self.assertEqual(get_render_pool()._max_workers, 1)
+
+    def test_endpoint_queries_use_indexes(self):
+        with self.assertQueriesUseIndexes():
+            order = self.place_order()
+            self.client.get('/api/items/')
+            self.client.get('/api/items/', {'category': self.category.pk, 'min_rate': 5})
+            self.client.get('/api/items/search/', {'q': 'item'})
+            self.client.get('/api/items/search/', {'q': 'item', 'category': self.category.pk})
+            self.client.get('/api/categoryAPI/')
+            self.client.get('/api/categoryAPI/tree/')
+            self.client.post('/api/cart/', {'item': str(self.items[3].pk), 'quantity': 1}, format='json')
+            self.client.get('/api/cart/')
+            self.client.get('/api/address/')
+            self.client.patch(f'/api/address/{self.address.pk}/', {'is_default': True}, format='json')
+            self.client.get('/api/order/')
+            self.client.get('/api/order/history/')
+            self.client.get(f'/api/order/{order.pk}/')
+            self.client.get(f'/api/order/{order.pk}/invoice/')
+            self.client.patch(f'/api/order/{order.pk}/', {'order_status': 'Cancelled'}, format='json')
+
+    def test_index_check_catches_full_scans(self):
+        with self.assertRaisesMessage(AssertionError, 'SCAN app1_item'):
+            with self.assertQueriesUseIndexes():
+                list(Item.objects.filter(description='Item 1'))
+
+    def test_one_default_address_per_user(self):
+        response = self.client.post('/api/address/', {
+            'address_line': '2 Side St', 'city': 'Pune', 'state': 'MH', 'postal_code': '411002', 'country': 'India',
+            'is_default': True,
+        }, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(list(self.user.addresses.filter(is_default=True).values_list('pk', flat=True)),
+                         [uuid.UUID(response.data['id'])])
+
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Address.objects.filter(pk=self.address.pk).update(is_default=True)
+
+    def test_async_read_endpoints(self):
+        self.place_order()
+        headers = {'Authorization': self.client._credentials['HTTP_AUTHORIZATION']}
+        get = async_to_sync(self.async_client.get)
+        budgets = [
+            ('/api/async/items/', 1),
+            ('/api/async/categoryAPI/', 2),
+            ('/api/async/cart/', 2),
+            ('/api/async/order/', 3),
+            ('/api/async/address/', 1),
+        ]
+        for path, budget in budgets:
+            with self.subTest(path=path), self.assertMaxQueries(budget):
+                response = get(path, headers=headers)
+            self.assertEqual(response.status_code, 200)
+
+        self.assertEqual(get('/api/async/order/').status_code, 401)
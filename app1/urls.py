@@ -1,16 +1,30 @@
 from django.urls import path
-from .views import ItemAPI , CategoryAPI , CartAPIView , OrderAPIView ,AddressAPIView ,InvoicePDFAPIView
+from .async_views import AsyncItemAPI, AsyncCategoryAPI, AsyncCartAPIView, AsyncOrderAPIView, AsyncAddressAPIView
+from .views import ItemAPI , ItemSearchAPIView , ItemImportAPIView , CategoryAPI , CatalogTreeAPIView , CacheMetricsAPIView , CartAPIView , CartBatchAPIView , OrderAPIView , OrderHistoryAPIView ,AddressAPIView ,InvoicePDFAPIView ,InvoiceExportAPIView
 
 urlpatterns = [
     path('items/', ItemAPI.as_view(), name='item-list-create'),
+    path('items/search/', ItemSearchAPIView.as_view(), name='item-search'),
+    path('items/import/', ItemImportAPIView.as_view(), name='item-import'),
     path('items/<uuid:pk>/', ItemAPI.as_view(), name='item-update'),
     path('categoryAPI/', CategoryAPI.as_view(), name='item-list-create'),
+    path('categoryAPI/tree/', CatalogTreeAPIView.as_view(), name='catalog-tree'),
     path('categoryAPI/<uuid:pk>/', CategoryAPI.as_view(), name='CategoryAPI-update'),
+    path('cache/metrics/', CacheMetricsAPIView.as_view(), name='cache-metrics'),
     path('cart/', CartAPIView.as_view(), name='cart-add'),
+    path('cart/batch/', CartBatchAPIView.as_view(), name='cart-batch'),
     path('cart/items/<uuid:pk>/', CartAPIView.as_view(), name='cart-item-detail'),
     path('order/',OrderAPIView.as_view(),name="order"),
+    path('order/history/',OrderHistoryAPIView.as_view(),name="order_history"),
     path('order/<uuid:pk>/',OrderAPIView.as_view(),name="order_status"),
     path("address/",AddressAPIView.as_view(),name="address"),
     path("address/<uuid:pk>/",AddressAPIView.as_view(),name="address_update"),
     path('order/<uuid:order_id>/invoice/', InvoicePDFAPIView.as_view(), name='invoice-pdf'),
+    path('invoices/export/', InvoiceExportAPIView.as_view(), name='invoice-export'),
+
+    path('async/items/', AsyncItemAPI.as_view(), name='async-item-list'),
+    path('async/categoryAPI/', AsyncCategoryAPI.as_view(), name='async-category-list'),
+    path('async/cart/', AsyncCartAPIView.as_view(), name='async-cart'),
+    path('async/order/', AsyncOrderAPIView.as_view(), name='async-order-list'),
+    path('async/address/', AsyncAddressAPIView.as_view(), name='async-address-list'),
     ]
\ No newline at end of file
@@ -0,0 +1,47 @@
+from django.http import StreamingHttpResponse
+from rest_framework.utils.encoders import JSONEncoder
+
+STREAM_CHUNK_SIZE = 2000
+
+
+def stream_json_array(rows, serialize, chunk_size=STREAM_CHUNK_SIZE):
+    """
+    Stream ``rows`` as a JSON array, one ``serialize(row)`` per element.
+
+    Pass a queryset ``.iterator(chunk_size=...)`` as ``rows`` so neither the
+    rows nor the rendered body are ever held in memory all at once.
+    """
+    encoder = JSONEncoder()
+
+    def generate():
+        yield '['
+        buffer = []
+        separator = ''
+        for row in rows:
+            buffer.append(separator + encoder.encode(serialize(row)))
+            separator = ','
+            if len(buffer) >= chunk_size:
+                yield ''.join(buffer)
+                buffer = []
+        yield ''.join(buffer) + ']'
+
+    return StreamingHttpResponse(generate(), content_type='application/json')
+
+
+def astream_json_array(rows, serialize, chunk_size=STREAM_CHUNK_SIZE):
+    """Async twin of ``stream_json_array`` for ``.aiterator()`` row sources."""
+    encoder = JSONEncoder()
+
+    async def generate():
+        yield '['
+        buffer = []
+        separator = ''
+        async for row in rows:
+            buffer.append(separator + encoder.encode(serialize(row)))
+            separator = ','
+            if len(buffer) >= chunk_size:
+                yield ''.join(buffer)
+                buffer = []
+        yield ''.join(buffer) + ']'
+
+    return StreamingHttpResponse(generate(), content_type='application/json')
@@ -1,22 +1,37 @@
+import logging
 from rest_framework.views import APIView
 from rest_framework import status
 from .models import Category, Item , Cart , CartItem ,Address ,Order ,OrderItem
-from .serializers import CategorySerializer, ItemSerializer , CartItemSerializer ,AddressSerializer , OrderSerializer
+from .serializers import CategorySerializer, ItemSerializer , CartItemSerializer , CartBatchSerializer ,AddressSerializer , OrderSerializer , OrderSummarySerializer , ItemFilterSerializer , ItemSearchSerializer , InvoiceExportFilterSerializer
+from .pagination import KeysetPagination, OffsetPagination
+from .catalog import get_catalog_tree
+from .utils import stream_json_array, STREAM_CHUNK_SIZE
+from .invoices import (ensure_invoice, invoice_context, invoice_filename, invoice_fingerprint, invoice_storage,
+                       iter_invoice_archive, stored_invoice_name)
+from .imports import import_items, FORMATS
+from .search import search_items
+from .stock import reserve_stock, release_order_stock, InsufficientStock
+from demo.cache import cached_read, cache_metrics
 from rest_framework.response import Response    
 from django.shortcuts import get_object_or_404
-from rest_framework_simplejwt.authentication import JWTAuthentication
+from authentication.authentication import CachedJWTAuthentication
 from rest_framework.permissions import IsAuthenticated, AllowAny
-from django.db import transaction
-from django.http import FileResponse
-from io import BytesIO
-from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer
-from reportlab.lib.pagesizes import A4
-from reportlab.lib import colors
-from reportlab.lib.styles import getSampleStyleSheet
-from discounts.models import Coupon
-from discounts.utils import validate_code
+from django.db import IntegrityError, transaction
+from django.db.models import OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+from django.http import FileResponse, StreamingHttpResponse
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from discounts.index import lookup_coupon
+from discounts.utils import validate_code, redeem_coupon, CouponUnavailable
+from reports.rollups import record_sale
+
+logger = logging.getLogger(__name__)
+
+SUMMARY_FIELDS = ['id', 'user', 'order_status', 'total_amount', 'discounted_amount', 'is_paid', 'created_at']
+
 class ItemAPI(APIView):
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [CachedJWTAuthentication]
 
     def get_permissions(self):
         if self.request.method == 'GET':
@@ -24,9 +39,20 @@ class ItemAPI(APIView):
         return [IsAuthenticated()]
 
     def get(self, request):
-        items = Item.objects.filter(is_active=True, stock_count__gt=0)
-        serializer = ItemSerializer(items, many=True)
-        return Response(serializer.data)
+        filters = ItemFilterSerializer(data=request.query_params)
+        if not filters.is_valid():
+            return Response(filters.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        data = cached_read('items', [Item], lambda: self.list_items(request, filters),
+                           params=request.build_absolute_uri())
+        return Response(data)
+
+    def list_items(self, request, filters):
+        items = filters.filter_queryset(Item.objects.filter(is_active=True, stock_count__gt=0))
+        paginator = KeysetPagination()
+        page = paginator.paginate_queryset(items, request, view=self)
+        serializer = ItemSerializer(page, many=True)
+        return paginator.get_paginated_response(serializer.data).data
 
     def post(self, request):
         serializer = ItemSerializer(data=request.data)
@@ -38,7 +64,7 @@ class ItemAPI(APIView):
     def patch(self, request, pk):
         item = get_object_or_404(Item, pk=pk)
 
-        if request.user != item.user and not request.user.is_superuser:
+        if item.user_id != request.user.id and not request.user.is_superuser:
             return Response({'error': 'Permission Denied.'}, status=status.HTTP_403_FORBIDDEN)
 
         serializer = ItemSerializer(item, data=request.data, partial=True)
@@ -50,7 +76,7 @@ class ItemAPI(APIView):
     def delete(self, request, pk):
         item = get_object_or_404(Item, pk=pk)
 
-        if request.user != item.user and not request.user.is_superuser:
+        if item.user_id != request.user.id and not request.user.is_superuser:
             return Response({'error': 'Permission Denied.'}, status=status.HTTP_403_FORBIDDEN)
 
         if item.stock_count > 0:
@@ -62,8 +88,49 @@ class ItemAPI(APIView):
         item.delete()
         return Response({'message': 'Item deleted successfully.', "stock": item.stock_count}, status=status.HTTP_200_OK)
         
+class ItemSearchAPIView(APIView):
+    authentication_classes = [CachedJWTAuthentication]
+    permission_classes = [AllowAny]
+
+    def get(self, request):
+        filters = ItemSearchSerializer(data=request.query_params)
+        if not filters.is_valid():
+            return Response(filters.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        data = cached_read('item-search', [Item], lambda: self.search(request, filters),
+                           params=request.build_absolute_uri())
+        return Response(data)
+
+    def search(self, request, filters):
+        items = filters.filter_queryset(Item.objects.filter(is_active=True, stock_count__gt=0))
+        items = search_items(items, filters.validated_data['q'])
+        paginator = OffsetPagination()
+        page = paginator.paginate_queryset(items, request, view=self)
+        serializer = ItemSerializer(page, many=True)
+        return paginator.get_paginated_response(serializer.data).data
+
+
+class ItemImportAPIView(APIView):
+    authentication_classes = [CachedJWTAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        if not request.user.is_superuser:
+            return Response({'error': 'Permission Denied.'}, status=status.HTTP_403_FORBIDDEN)
+
+        fmt = FORMATS.get(request.content_type.split(';')[0].strip())
+        if fmt is None:
+            return Response({'error': 'Send the rows as text/csv or application/x-ndjson.'},
+                            status=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE)
+
+        # The body is read line by line straight off the request, never
+        # buffered whole, so the upload size doesn't matter.
+        report = import_items(request._request, fmt, user=request.user)
+        return Response(report.as_dict(), status=status.HTTP_200_OK)
+
+
 class CategoryAPI(APIView):
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [CachedJWTAuthentication]
 
     def get_permissions(self):
         if self.request.method == 'GET':
@@ -71,9 +138,13 @@ class CategoryAPI(APIView):
         return [IsAuthenticated()]
 
     def get(self, request):
-        items = Category.objects.filter(is_active=True)
+        data = cached_read('categories', [Category, Item], self.list_categories)
+        return Response(data)
+
+    def list_categories(self):
+        items = Category.objects.filter(is_active=True).prefetch_related('items')
         serializer = CategorySerializer(items, many=True)
-        return Response(serializer.data)
+        return serializer.data
      
     def post(self, request):
         serializer = CategorySerializer(data=request.data)
@@ -103,8 +174,26 @@ class CategoryAPI(APIView):
         return Response({'message': 'Category deleted successfully.'}, status=status.HTTP_200_OK)
 
 
+class CatalogTreeAPIView(APIView):
+    authentication_classes = []
+    permission_classes = [AllowAny]
+
+    def get(self, request):
+        return Response(get_catalog_tree(), status=status.HTTP_200_OK)
+
+
+class CacheMetricsAPIView(APIView):
+    authentication_classes = [CachedJWTAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        if not request.user.is_superuser:
+            return Response({'error': 'Permission Denied.'}, status=status.HTTP_403_FORBIDDEN)
+        return Response(cache_metrics(), status=status.HTTP_200_OK)
+
+
 class CartAPIView(APIView):
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [CachedJWTAuthentication]
     permission_classes = [IsAuthenticated]
 
     def get_cart(self, user):
@@ -113,23 +202,26 @@ class CartAPIView(APIView):
 
     def get(self, request):
         if request.user.is_superuser:
-            cart_items = CartItem.objects.select_related('cart__user', 'item').all()
-            data = []
-            for cart_item in cart_items:
-                serialized_item = CartItemSerializer(cart_item).data
-                serialized_item['user'] = {
-                    "id": str(cart_item.cart.user.id),
-                    "username": cart_item.cart.user.username,
-                    "email": cart_item.cart.user.email
-                }
-                data.append(serialized_item)
-            return Response(data, status=status.HTTP_200_OK)
+            cart_items = (
+                CartItem.objects.select_related('cart__user', 'item')
+                .order_by('pk')
+                .iterator(chunk_size=STREAM_CHUNK_SIZE)
+            )
+            return stream_json_array(cart_items, self.serialize_cart_item)
 
-        else:
-            cart = self.get_cart(request.user)
-            cart_items = cart.cart_items.all()
-            serializer = CartItemSerializer(cart_items, many=True)
-            return Response(serializer.data, status=status.HTTP_200_OK)
+        cart = self.get_cart(request.user)
+        cart_items = cart.cart_items.select_related('item')
+        serializer = CartItemSerializer(cart_items, many=True)
+        return Response(serializer.data, status=status.HTTP_200_OK)
+
+    def serialize_cart_item(self, cart_item):
+        serialized_item = CartItemSerializer(cart_item).data
+        serialized_item['user'] = {
+            "id": str(cart_item.cart.user.id),
+            "username": cart_item.cart.user.username,
+            "email": cart_item.cart.user.email
+        }
+        return serialized_item
 
     def post(self, request):
         item_id = request.data.get('item')
@@ -156,7 +248,7 @@ class CartAPIView(APIView):
         return Response(serializer.data, status=status.HTTP_200_OK)
 
     def patch(self, request, pk):
-        cart_item = get_object_or_404(CartItem, pk=pk)
+        cart_item = get_object_or_404(CartItem.objects.select_related('item'), pk=pk)
         serializer = CartItemSerializer(cart_item, data=request.data, partial=True)
 
         if serializer.is_valid():
@@ -177,15 +269,82 @@ class CartAPIView(APIView):
         return Response({'message': 'Item removed from cart.'}, status=status.HTTP_200_OK)
     
 
+class CartBatchAPIView(APIView):
+    authentication_classes = [CachedJWTAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request):
+        batch = CartBatchSerializer(data=request.data)
+        if not batch.is_valid():
+            return Response(batch.errors, status=status.HTTP_400_BAD_REQUEST)
+        operations = batch.validated_data['operations']
+
+        with transaction.atomic():
+            # Locking the cart row serialises concurrent batches for one user.
+            cart, _ = Cart.objects.select_for_update().get_or_create(user=request.user)
+            current = {
+                cart_item.item_id: cart_item
+                for cart_item in cart.cart_items.select_related('item').select_for_update(of=('self',))
+            }
+            items = Item.objects.in_bulk({operation['item'] for operation in operations})
+
+            quantities = {item_id: cart_item.quantity for item_id, cart_item in current.items()}
+            last_operation = {}
+            errors = []
+            for index, operation in enumerate(operations):
+                item_id = operation['item']
+                if item_id not in items:
+                    errors.append({'index': index, 'item': item_id, 'error': 'Item not found.'})
+                    continue
+                if operation['action'] == 'add':
+                    quantities[item_id] = quantities.get(item_id, 0) + operation['quantity']
+                elif operation['action'] == 'set':
+                    quantities[item_id] = operation['quantity']
+                else:
+                    quantities[item_id] = 0
+                last_operation[item_id] = index
+
+            for item_id, index in last_operation.items():
+                item = items[item_id]
+                if quantities[item_id] > item.stock_count:
+                    errors.append({'index': index, 'item': item_id,
+                                   'error': f'Cannot set quantity to {quantities[item_id]}. Only {item.stock_count} in stock.'})
+            if errors:
+                transaction.set_rollback(True)
+                return Response({'errors': sorted(errors, key=lambda error: error['index'])},
+                                status=status.HTTP_400_BAD_REQUEST)
+
+            created, updated, removed = [], [], []
+            for item_id, quantity in quantities.items():
+                cart_item = current.get(item_id)
+                if cart_item is None:
+                    if quantity:
+                        created.append(CartItem(cart=cart, item=items[item_id], quantity=quantity))
+                elif not quantity:
+                    removed.append(cart_item.pk)
+                elif quantity != cart_item.quantity:
+                    cart_item.quantity = quantity
+                    updated.append(cart_item)
+
+            CartItem.objects.bulk_create(created)
+            if updated:
+                CartItem.objects.bulk_update(updated, ['quantity'])
+            if removed:
+                CartItem.objects.filter(pk__in=removed).delete()
+
+        cart_items = [cart_item for cart_item in current.values() if cart_item.pk not in removed] + created
+        cart_items.sort(key=lambda cart_item: cart_item.created_at)
+        return Response(CartItemSerializer(cart_items, many=True).data, status=status.HTTP_200_OK)
+
+
 class AddressAPIView(APIView):
-    authentication_classes=[JWTAuthentication]
+    authentication_classes=[CachedJWTAuthentication]
     permission_classes= [IsAuthenticated]
 
     def post(self,request):
         serializer = AddressSerializer(data=request.data)
         if serializer.is_valid():
-            serializer.save(user=request.user)
-            return Response(serializer.data,status=status.HTTP_201_CREATED)       
+            return self.save(request, serializer, status.HTTP_201_CREATED, user=request.user)
         return Response(serializer.errors,status=status.HTTP_400_BAD_REQUEST)
     
     def get(self,request):
@@ -196,30 +355,57 @@ class AddressAPIView(APIView):
     
     def patch(self,request,pk):
         address = get_object_or_404(Address,pk=pk,user=request.user)
-        
-        if "is_default" in request.data and request.data["is_default"]:
-            Address.objects.filter(user=request.user).update(is_default=False)
 
         serializer= AddressSerializer(address,data=request.data,partial=True)
         if serializer.is_valid():
-            serializer.save()
-            return Response(serializer.data)
+            return self.save(request, serializer, status.HTTP_200_OK)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+    def save(self, request, serializer, success_status, **kwargs):
+        if not serializer.validated_data.get('is_default'):
+            serializer.save(**kwargs)
+            return Response(serializer.data, status=success_status)
+
+        # A user has at most one default address (address_one_default_per_user),
+        # so the old default is cleared in the same transaction.
+        try:
+            with transaction.atomic():
+                defaults = Address.objects.filter(user=request.user, is_default=True)
+                if serializer.instance is not None:
+                    defaults = defaults.exclude(pk=serializer.instance.pk)
+                defaults.update(is_default=False)
+                serializer.save(**kwargs)
+        except IntegrityError:
+            return Response({"error": "Another default address was set at the same time. Please retry."},
+                            status=status.HTTP_409_CONFLICT)
+        return Response(serializer.data, status=success_status)
+
     def delete(self,request,pk):
         address = get_object_or_404(Address,pk=pk,user=request.user)
         address.delete()
         return Response({'message': 'Address deleted successfully.'}, status=status.HTTP_200_OK)
 
 class OrderAPIView(APIView):
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [CachedJWTAuthentication]
     permission_classes = [IsAuthenticated]
 
-    def get(self, request):
+    def get(self, request, pk=None):
+        if pk is not None:
+            orders = Order.objects.prefetch_related('order_items__item')
+            if not request.user.is_superuser:
+                orders = orders.filter(user=request.user)
+            order = get_object_or_404(orders, pk=pk)
+            return Response(OrderSerializer(order).data, status=status.HTTP_200_OK)
+
         if request.user.is_superuser:
-            orders = Order.objects.select_related('user').prefetch_related('order_items__item').all()
-        else:
-            orders = Order.objects.select_related('user').prefetch_related('order_items__item').filter(user=request.user)
+            orders = (
+                Order.objects.select_related('user').prefetch_related('order_items__item')
+                .order_by('pk')
+                .iterator(chunk_size=STREAM_CHUNK_SIZE)
+            )
+            return stream_json_array(orders, lambda order: OrderSerializer(order).data)
+
+        orders = Order.objects.select_related('user').prefetch_related('order_items__item').filter(user=request.user)
 
         serializer = OrderSerializer(orders, many=True)
         return Response(serializer.data, status=status.HTTP_200_OK)
@@ -229,29 +415,25 @@ class OrderAPIView(APIView):
             user_id = request.data.get("user_id")
             if not user_id:
                 return Response({"error": "user_id is required for superuser"}, status=status.HTTP_400_BAD_REQUEST)
-            order = get_object_or_404(Order, pk=pk, user__id=user_id)
+            order = get_object_or_404(Order.objects.prefetch_related('order_items__item'), pk=pk, user__id=user_id)
         else:
-            order = get_object_or_404(Order, pk=pk, user=request.user)
+            order = get_object_or_404(Order.objects.prefetch_related('order_items__item'), pk=pk, user=request.user)
 
         new_status = request.data.get("order_status")
-        if new_status == "Cancelled":
-            if order.order_status not in ["Pending", "Shipped"]:
-                return Response({f"message": f"Your order is already {order.order_status}."}, status=status.HTTP_400_BAD_REQUEST)
-
-            for cart_item in order.cart.cart_items.all():
-                item = cart_item.item
-                item.stock_count += cart_item.quantity
-                item.save()
-
-        elif not request.user.is_superuser:
+        if new_status != "Cancelled" and not request.user.is_superuser:
             return Response({"error": "You are not allowed to change status other than 'Cancelled'."}, status=status.HTTP_403_FORBIDDEN)
 
         serializer = OrderSerializer(order, data=request.data, partial=True)
-        if serializer.is_valid():
-            serializer.save()
-            return Response(serializer.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
-        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        # The restock and the save commit together, or not at all.
+        with transaction.atomic():
+            if new_status == "Cancelled" and not release_order_stock(order):
+                order.refresh_from_db(fields=['order_status'])
+                return Response({f"message": f"Your order is already {order.order_status}."}, status=status.HTTP_400_BAD_REQUEST)
+            serializer.save()
+        return Response(serializer.data)
 
 
     def delete(self, request, pk):
@@ -274,8 +456,7 @@ class OrderAPIView(APIView):
         coupon = None
 
         if(coupon_code):
-            coupon = Coupon.objects.filter(is_active=True, code=coupon_code).order_by
-            ("-created_at").first()
+            coupon = lookup_coupon(coupon_code)
 
             is_valid, result = validate_code(coupon)
             if not is_valid:
@@ -291,56 +472,55 @@ class OrderAPIView(APIView):
                                 status=status.HTTP_400_BAD_REQUEST)
 
         cart = get_object_or_404(Cart, user=request.user)
-        cart_items = cart.cart_items.select_related('item').all()
+        cart_items = list(cart.cart_items.all())
 
-        if not cart_items.exists():
+        if not cart_items:
             return Response({"error": "Cart is empty."}, status=status.HTTP_400_BAD_REQUEST)
 
-        original_total = 0.0
-
-        with transaction.atomic():
-            order = Order.objects.create(
-                user=request.user,
-                cart=cart,
-                address=address,
-                total_amount=0,
-                is_paid=False,
-                discounted_amount=0.0
-            )
-
-            for cart_item in cart_items:
-                item = cart_item.item
-                if item.stock_count < cart_item.quantity:
-                    transaction.set_rollback(True)
-                    return Response({"error": f"Not enough stock for {item.description}."}, status=400)
-
-                item.stock_count -= cart_item.quantity
-                item.save()
-
-                line_total = cart_item.quantity * item.rate
-                original_total += line_total
-
-                OrderItem.objects.create(
-                    order=order,
-                    item=item,
-                    quantity=cart_item.quantity,
-                    rate=item.rate,
-                    line_total=round(line_total, 2)
+        try:
+            with transaction.atomic():
+                items = reserve_stock({cart_item.item_id: cart_item.quantity for cart_item in cart_items})
+
+                original_total = 0.0
+                order_items = []
+                for cart_item in cart_items:
+                    item = items[cart_item.item_id]
+                    line_total = cart_item.quantity * item.rate
+                    original_total += line_total
+                    order_items.append(OrderItem(
+                        item=item,
+                        quantity=cart_item.quantity,
+                        rate=item.rate,
+                        line_total=round(line_total, 2)
+                    ))
+
+                # Apply discount
+                discount_value = round(original_total * discount_percent / 100, 2) if discount_percent else 0.0
+                final_total = round(original_total - discount_value, 2)
+
+                order = Order.objects.create(
+                    user=request.user,
+                    cart=cart,
+                    address=address,
+                    total_amount=final_total,
+                    is_paid=False,
+                    discounted_amount=discount_value
                 )
-
-            # Apply discount
-            discount_value = round(original_total * discount_percent / 100, 2) if discount_percent else 0.0
-            final_total = round(original_total - discount_value, 2)
-
-            if coupon:
-                coupon.usage_count += 1
-                coupon.save()
-
-            order.total_amount = final_total
-            order.discounted_amount = discount_value
-            order.save()
-
-            cart_items.delete()
+                for order_item in order_items:
+                    order_item.order = order
+                OrderItem.objects.bulk_create(order_items)
+                record_sale(order, order_items)
+
+                CartItem.objects.filter(pk__in=[cart_item.pk for cart_item in cart_items]).delete()
+
+                # Last statement before commit: the coupon row stays locked
+                # from here until the transaction ends.
+                if coupon:
+                    redeem_coupon(coupon, request.user)
+        except InsufficientStock as exc:
+            return Response({"error": exc.message}, status=status.HTTP_400_BAD_REQUEST)
+        except CouponUnavailable as exc:
+            return Response({"message": exc.message}, status=status.HTTP_400_BAD_REQUEST)
 
         return Response({
             "message": "Order placed successfully.",
@@ -352,64 +532,80 @@ class OrderAPIView(APIView):
         }, status=status.HTTP_201_CREATED)
 
 
+class OrderHistoryAPIView(APIView):
+    authentication_classes = [CachedJWTAuthentication]
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        # Summary rows only: the item count is a correlated subquery evaluated
+        # for the page being returned, and line items are left to the detail
+        # endpoint.
+        item_count = (
+            OrderItem.objects.filter(order=OuterRef('pk'))
+            .values('order')
+            .annotate(total=Sum('quantity'))
+            .values('total')
+        )
+        orders = Order.objects.only(*SUMMARY_FIELDS).annotate(item_count=Coalesce(Subquery(item_count), 0))
+        if not request.user.is_superuser:
+            orders = orders.filter(user=request.user)
+
+        paginator = KeysetPagination()
+        page = paginator.paginate_queryset(orders, request, view=self)
+        serializer = OrderSummarySerializer(page, many=True)
+        return paginator.get_paginated_response(serializer.data)
+
+
 class InvoicePDFAPIView(APIView):
     permission_classes = [IsAuthenticated]
 
     def get(self, request, order_id):
-        order = get_object_or_404(Order, id=order_id, user=request.user)
+        order = get_object_or_404(Order.objects.select_related('user', 'address'), id=order_id, user=request.user)
         order_items = order.order_items.select_related('item').all()
 
-        buffer = BytesIO()
-        doc = SimpleDocTemplate(buffer, pagesize=A4)
-        elements = []
-        styles = getSampleStyleSheet()
-
-        short_order_id = str(order.id)[:8].upper()
-        elements.append(Paragraph(f"INVOICE - Order #{short_order_id}", styles['Title']))
-        elements.append(Spacer(1, 12))
-
-        address = order.address
-        address_text = f"{address.address_line}, {address.city}, {address.state}, {address.postal_code}, {address.country}"
-        elements.append(Paragraph(f"Customer: {order.user.username}", styles['Normal']))
-        elements.append(Paragraph(f"Shipping Address: {address_text}", styles['Normal']))
-        elements.append(Paragraph(f"Order Date: {order.created_at.strftime('%Y-%m-%d %H:%M')}", styles['Normal']))
-        elements.append(Paragraph(f"Payment Status: {'PAID' if order.is_paid else 'UNPAID'}", styles['Normal']))
-        elements.append(Spacer(1, 12))
-
-        table_data = [["Item Description", "Quantity", "Rate (₹)", "Line Total (₹)"]]
-
-        original_total = 0.0
-        for order_item in order_items:
-            item = order_item.item
-            table_data.append([
-                item.description,
-                str(order_item.quantity),
-                f"{order_item.rate:.2f}",
-                f"{order_item.line_total:.2f}"
-            ])
-            original_total += order_item.line_total
-
-        table_data.append(["", "", "Subtotal", f"{original_total:.2f}"])
-
-        if order.discounted_amount > 0:
-            discount = order.discounted_amount
-            table_data.append(["", "", "Discount", f"-{discount:.2f}"])
-        
-        table_data.append(["", "", "Total Payable", f"{order.total_amount:.2f}"])
-
-        table = Table(table_data, hAlign='LEFT', colWidths=[200, 80, 80, 80])
-        table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.grey),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-            ('ALIGN', (1, 1), (-1, -1), 'CENTER'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('BOTTOMPADDING', (0, 0), (-1, 0), 12),
-            ('GRID', (0, 0), (-1, -1), 1, colors.black),
-        ]))
-
-        elements.append(table)
-        doc.build(elements)
-
-        buffer.seek(0)
-        filename = f"Invoice_{short_order_id}.pdf"
-        return FileResponse(buffer, as_attachment=True, filename=filename)
\ No newline at end of file
+        context = invoice_context(order, order_items)
+        fingerprint = invoice_fingerprint(context)
+        etag = f'"{fingerprint}"'
+        storage = invoice_storage()
+        name = stored_invoice_name(fingerprint)
+
+        last_modified = storage.get_modified_time(name) if storage.exists(name) else None
+        not_modified = get_conditional_response(
+            request, etag=etag, last_modified=last_modified and int(last_modified.timestamp())
+        )
+        if not_modified is not None:
+            return not_modified
+
+        if last_modified is None:
+            name = ensure_invoice(context, fingerprint)
+            last_modified = storage.get_modified_time(name)
+
+        response = FileResponse(storage.open(name, 'rb'), as_attachment=True, filename=invoice_filename(context),
+                                content_type='application/pdf')
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(last_modified.timestamp())
+        response['Cache-Control'] = 'private, no-cache'
+        return response
+
+
+class InvoiceExportAPIView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        if not request.user.is_superuser:
+            return Response({'error': 'Permission Denied.'}, status=status.HTTP_403_FORBIDDEN)
+
+        filters = InvoiceExportFilterSerializer(data=request.query_params)
+        if not filters.is_valid():
+            return Response(filters.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        orders = filters.filter_queryset(Order.objects.all())
+        response = StreamingHttpResponse(
+            iter_invoice_archive(orders, progress=self.log_progress), content_type='application/zip'
+        )
+        response['Content-Disposition'] = 'attachment; filename="invoices.zip"'
+        return response
+
+    def log_progress(self, done, total):
+        if done == total or done % 100 == 0:
+            logger.info('Invoice export: %d/%d invoices written', done, total)
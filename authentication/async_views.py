@@ -0,0 +1,35 @@
+from asgiref.sync import sync_to_async
+from django.contrib.auth import aauthenticate
+from rest_framework import status
+
+from demo.async_views import AsyncAPIView
+
+from .passwords import LoginOverloaded
+from .views import issue_tokens
+
+
+class AsyncLoginView(AsyncAPIView):
+    """
+    Login for ASGI deployments: waiting on the password pool doesn't hold a
+    worker thread, so a login burst can't crowd out other requests.
+    """
+    authentication_required = False
+
+    async def post(self, request):
+        data = self.parse_json(request)
+        username = data.get('username')
+        password = data.get('password')
+
+        if not username or not password:
+            return self.respond({'error': 'Invalid Credentials'}, status=status.HTTP_401_UNAUTHORIZED)
+
+        try:
+            user = await aauthenticate(request, username=username, password=password)
+        except LoginOverloaded as exc:
+            response = self.respond({'error': exc.message}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+            response['Retry-After'] = str(exc.retry_after)
+            return response
+
+        if user is None:
+            return self.respond({'error': 'Invalid Credentials'}, status=status.HTTP_401_UNAUTHORIZED)
+        return self.respond(await sync_to_async(issue_tokens)(user))
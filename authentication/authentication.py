@@ -0,0 +1,145 @@
+import hashlib
+
+from django.conf import settings
+from django.db import router
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+from demo.cache import get_cache
+from demo.routers import use_primary
+
+USER_VERSION_CLAIM = 'user_version'
+SNAPSHOT_FIELDS = ('id', 'username', 'is_superuser', 'is_staff', 'is_active')
+
+
+def user_version(user):
+    # Changes whenever the password or any flag the snapshot trusts changes.
+    raw = f'{user.password}|{user.is_active}|{user.is_staff}|{user.is_superuser}|{user.username}'
+    return hashlib.md5(raw.encode('utf-8')).hexdigest()[:16]
+
+
+def add_user_claims(token, user):
+    token[USER_VERSION_CLAIM] = user_version(user)
+    return token
+
+
+def snapshot_key(user_id):
+    return f'auth:user:{user_id}'
+
+
+def user_snapshot(user):
+    return {
+        'version': user_version(user),
+        'values': {field: getattr(user, field) for field in SNAPSHOT_FIELDS},
+    }
+
+
+def cache_user_snapshot(user):
+    get_cache().set(snapshot_key(user.pk), user_snapshot(user), settings.AUTH_USER_SNAPSHOT_TTL)
+
+
+def token_user_id(request):
+    """The user id in a valid bearer token on ``request``, without loading the user."""
+    authentication = JWTAuthentication()
+    header = authentication.get_header(request)
+    raw_token = authentication.get_raw_token(header) if header else None
+    if raw_token is None:
+        return None
+    try:
+        return authentication.get_validated_token(raw_token).get(api_settings.USER_ID_CLAIM)
+    except InvalidToken:
+        return None
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication that resolves the user from a short-lived cached
+    snapshot of the row (id, username and the permission flags) instead of
+    loading it on every request.
+
+    Only tokens carrying the ``user_version`` claim use the snapshot, and only
+    while the snapshot's version matches it. Anything else loads the user from
+    the database; a version that still differs there means the password or
+    permissions changed after the token was issued, and the token is refused.
+    The snapshot user has every other field deferred, so reading one costs a
+    query.
+    """
+
+    def get_user(self, validated_token):
+        user = self.snapshot_user(validated_token, get_cache().get(self.snapshot_key(validated_token)))
+        if user is not None:
+            return user
+        with use_primary():
+            user = super().get_user(validated_token)
+        self.check_version(validated_token, user)
+        if USER_VERSION_CLAIM in validated_token:
+            cache_user_snapshot(user)
+        return user
+
+    def snapshot_key(self, validated_token):
+        return snapshot_key(validated_token.get(api_settings.USER_ID_CLAIM))
+
+    def snapshot_user(self, validated_token, snapshot):
+        version = validated_token.get(USER_VERSION_CLAIM)
+        if version is None or snapshot is None or snapshot['version'] != version:
+            return None
+        # from_db() expects the values in the model's field order.
+        values = snapshot['values']
+        fields = [field.attname for field in self.user_model._meta.concrete_fields if field.attname in values]
+        return self.user_model.from_db(router.db_for_read(self.user_model), fields, [values[field] for field in fields])
+
+    def check_version(self, validated_token, user):
+        version = validated_token.get(USER_VERSION_CLAIM)
+        if version is not None and version != user_version(user):
+            raise AuthenticationFailed(_("The user's account has changed."), code="user_changed")
+
+
+class AsyncJWTAuthentication(CachedJWTAuthentication):
+    """
+    CachedJWTAuthentication for async views. Decoding and verifying the token
+    is pure CPU work, so only the snapshot and user lookups are awaited.
+    """
+
+    async def aauthenticate(self, request):
+        header = self.get_header(request)
+        if header is None:
+            return None
+
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+
+        validated_token = self.get_validated_token(raw_token)
+        return await self.aget_user(validated_token), validated_token
+
+    async def aget_user(self, validated_token):
+        cache = get_cache()
+        user = self.snapshot_user(validated_token, await cache.aget(self.snapshot_key(validated_token)))
+        if user is not None:
+            return user
+
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError as e:
+            raise InvalidToken(_("Token contained no recognizable user identification")) from e
+
+        try:
+            with use_primary():
+                user = await self.user_model.objects.aget(**{api_settings.USER_ID_FIELD: user_id})
+        except self.user_model.DoesNotExist as e:
+            raise AuthenticationFailed(_("User not found"), code="user_not_found") from e
+
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+
+        if api_settings.CHECK_REVOKE_TOKEN:
+            if validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != get_md5_hash_password(user.password):
+                raise AuthenticationFailed(_("The user's password has been changed."), code="password_changed")
+
+        self.check_version(validated_token, user)
+        if USER_VERSION_CLAIM in validated_token:
+            await cache.aset(snapshot_key(user.pk), user_snapshot(user), settings.AUTH_USER_SNAPSHOT_TTL)
+        return user
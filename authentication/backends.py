@@ -0,0 +1,50 @@
+"""
+ModelBackend with the password check handed to the login pool.
+
+Lookup by natural key, the timing guard for unknown usernames, hash upgrades
+and the inactive-user rule are ModelBackend's, so login still goes through
+``authenticate()``: other ``AUTHENTICATION_BACKENDS`` get their turn and
+``user_login_failed`` fires. A full pool raises LoginOverloaded, which
+``authenticate()`` lets through to the view.
+"""
+import asyncio
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+
+from .passwords import get_password_pool
+
+UserModel = get_user_model()
+
+
+class PooledModelBackend(ModelBackend):
+    def authenticate(self, request, username=None, password=None, **kwargs):
+        if username is None:
+            username = kwargs.get(UserModel.USERNAME_FIELD)
+        if username is None or password is None:
+            return None
+        try:
+            user = UserModel._default_manager.get_by_natural_key(username)
+        except UserModel.DoesNotExist:
+            user = None
+        # The calling thread waits for the check; see authentication.passwords.
+        valid, rehash = get_password_pool().submit(user, password).result()
+        if valid and rehash:
+            user.set_password(password)
+            user.save(update_fields=['password'])
+        return user if valid and self.user_can_authenticate(user) else None
+
+    async def aauthenticate(self, request, username=None, password=None, **kwargs):
+        if username is None:
+            username = kwargs.get(UserModel.USERNAME_FIELD)
+        if username is None or password is None:
+            return None
+        try:
+            user = await UserModel._default_manager.aget_by_natural_key(username)
+        except UserModel.DoesNotExist:
+            user = None
+        valid, rehash = await asyncio.wrap_future(get_password_pool().submit(user, password))
+        if valid and rehash:
+            user.set_password(password)
+            await user.asave(update_fields=['password'])
+        return user if valid and self.user_can_authenticate(user) else None
@@ -0,0 +1,104 @@
+import statistics
+import time
+from datetime import timedelta
+from io import StringIO
+
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework_simplejwt.utils import aware_utcnow
+
+from authentication.tokens import CachedRefreshToken, forget_live
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed the token blacklist with synthetic rows, then time the refresh-path blacklist check "
+        "(cached and uncached), token rotation and prune_tokens against it. Seeded rows are removed "
+        "afterwards. Seeding 10M rows takes a while; run it against a scratch copy of the database."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=10_000_000)
+        parser.add_argument('--expired', type=float, default=0.5,
+                            help="Fraction of the seeded tokens that are already expired.")
+        parser.add_argument('--batch-size', type=int, default=20_000)
+        parser.add_argument('--samples', type=int, default=1000)
+
+    def handle(self, *args, **options):
+        prefix = f'bench-{int(time.time())}'
+        try:
+            started = time.perf_counter()
+            self.seed(prefix, options)
+            self.stdout.write(f"seeded {options['rows']} blacklisted tokens in {time.perf_counter() - started:.1f}s")
+
+            tokens = [CachedRefreshToken() for _ in range(options['samples'])]
+            for i, token in enumerate(tokens):
+                token['jti'] = f'{prefix}-sample-{i}'
+                token.outstand()
+
+            self.report('check, cached', self.time_each(tokens, lambda token: token.check_blacklist()))
+            for token in tokens:
+                forget_live(token['jti'])
+            self.report('check, database', self.time_each(tokens, lambda token: token.check_blacklist()))
+            self.report('check, stock simplejwt', self.time_each(
+                tokens, lambda token: RefreshToken.check_blacklist(token),
+            ))
+            self.report('rotate', self.time_each(tokens, self.rotate))
+
+            started = time.perf_counter()
+            out = StringIO()
+            call_command('prune_tokens', batch_size=options['batch_size'], stdout=out)
+            self.stdout.write(f"prune_tokens: {time.perf_counter() - started:.1f}s, {out.getvalue().strip()}")
+        finally:
+            self.cleanup(prefix, options['batch_size'])
+
+    def seed(self, prefix, options):
+        now = aware_utcnow()
+        expired_rows = int(options['rows'] * options['expired'])
+        for start in range(0, options['rows'], options['batch_size']):
+            stop = min(start + options['batch_size'], options['rows'])
+            outstanding = OutstandingToken.objects.bulk_create(
+                OutstandingToken(
+                    jti=f'{prefix}-{i}', token='', created_at=now,
+                    expires_at=now + (timedelta(days=-1) if i < expired_rows else timedelta(days=7)),
+                )
+                for i in range(start, stop)
+            )
+            BlacklistedToken.objects.bulk_create(BlacklistedToken(token=token) for token in outstanding)
+
+    def rotate(self, token):
+        # What TokenRefreshSerializer does, with the new jti kept under the
+        # seeded prefix so cleanup finds it.
+        token.blacklist()
+        token['jti'] = f"{token['jti']}-r"
+        token.set_exp()
+        token.set_iat()
+        token.outstand()
+
+    def time_each(self, tokens, call):
+        latencies = []
+        for token in tokens:
+            start = time.perf_counter()
+            try:
+                call(token)
+            except TokenError:
+                pass
+            latencies.append(time.perf_counter() - start)
+        return sorted(latencies)
+
+    def report(self, label, latencies):
+        p99 = latencies[int(len(latencies) * 0.99) - 1]
+        self.stdout.write(
+            f"{label:<24} p50 {statistics.median(latencies) * 1000:.3f} ms   p99 {p99 * 1000:.3f} ms"
+        )
+
+    def cleanup(self, prefix, batch_size):
+        leftovers = OutstandingToken.objects.filter(jti__startswith=prefix).values_list('pk', flat=True)
+        while True:
+            ids = list(leftovers[:batch_size])
+            if not ids:
+                break
+            OutstandingToken.objects.filter(pk__in=ids).delete()
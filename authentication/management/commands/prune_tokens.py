@@ -0,0 +1,42 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from rest_framework_simplejwt.utils import aware_utcnow
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete expired outstanding refresh tokens and their blacklist entries in batches. "
+        "Each batch is its own short transaction, so it is safe to run from cron on a live site."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--pause', type=float, default=0.0,
+                            help="Seconds to sleep between batches to spread the load.")
+
+    def handle(self, *args, **options):
+        # Tokens expire in the order they were issued, so the expired rows sit
+        # at the low end of the primary key and each batch is a short scan.
+        expired = (
+            OutstandingToken.objects.filter(expires_at__lte=aware_utcnow())
+            .order_by('pk')
+            .values_list('pk', flat=True)
+        )
+        tokens = blacklisted = 0
+        while True:
+            ids = list(expired[:options['batch_size']])
+            if not ids:
+                break
+            with transaction.atomic():
+                _, deleted = OutstandingToken.objects.filter(pk__in=ids).delete()
+            tokens += deleted.get(OutstandingToken._meta.label, 0)
+            blacklisted += deleted.get(BlacklistedToken._meta.label, 0)
+            if options['pause']:
+                time.sleep(options['pause'])
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Deleted {tokens} expired tokens and {blacklisted} blacklist entries."
+        ))
@@ -0,0 +1,129 @@
+"""
+Bounded pool for the password checks behind login.
+
+PBKDF2 is deliberately slow, and a burst of logins run inline would tie up
+every worker that also serves catalog traffic. Logins instead hand the hash
+to a small thread pool (hashlib releases the GIL while it works, so the
+threads hash in parallel) and only ``LOGIN_HASH_WORKERS + LOGIN_HASH_QUEUE``
+checks may be running or waiting at once. Anything beyond that, or a check
+that waited in the queue longer than ``LOGIN_HASH_WAIT`` seconds, fails fast
+with LoginOverloaded so the client can retry instead of piling up.
+
+Only the hashing runs in the pool, called from PooledModelBackend
+(authentication.backends); the user lookup and any hash upgrade stay on the
+caller's thread and database connection. Under ASGI the login view awaits the
+check without holding a thread. Under WSGI the request thread still blocks
+for the queue wait plus the hash: the pool bounds how many hashes run at once
+and turns the excess away fast, but it doesn't free that thread.
+"""
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.contrib.auth.hashers import check_password, make_password
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+
+
+class LoginOverloaded(Exception):
+    message = "Too many logins in progress, please retry shortly."
+    retry_after = 1
+
+
+class PasswordPool:
+    def __init__(self, workers, queue_size, wait):
+        self.workers = workers
+        self.queue_size = queue_size
+        self.wait = wait
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='login-hash')
+        self.slots = threading.BoundedSemaphore(workers + queue_size)
+        self.lock = threading.Lock()
+        self.counts = Counter()
+        self.in_flight = 0
+        self.peak_in_flight = 0
+        self.wait_seconds = 0.0
+        self.hash_seconds = 0.0
+        self.max_hash_seconds = 0.0
+
+    def submit(self, user, password):
+        if not self.slots.acquire(blocking=False):
+            self.count('rejected')
+            raise LoginOverloaded()
+        with self.lock:
+            self.in_flight += 1
+            self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        return self.executor.submit(self.run, time.monotonic(), user, password)
+
+    def run(self, enqueued, user, password):
+        try:
+            return self.verify(enqueued, user, password)
+        finally:
+            with self.lock:
+                self.in_flight -= 1
+            self.slots.release()
+
+    def verify(self, enqueued, user, password):
+        started = time.monotonic()
+        if started - enqueued > self.wait:
+            self.count('timed_out')
+            raise LoginOverloaded()
+
+        rehash = []
+        if user is None:
+            # Hash anyway so unknown usernames take as long as wrong passwords.
+            make_password(password)
+            valid = False
+        else:
+            valid = check_password(password, user.password, setter=rehash.append)
+
+        elapsed = time.monotonic() - started
+        with self.lock:
+            self.counts['checked'] += 1
+            self.wait_seconds += started - enqueued
+            self.hash_seconds += elapsed
+            self.max_hash_seconds = max(self.max_hash_seconds, elapsed)
+        return valid, bool(rehash)
+
+    def count(self, outcome):
+        with self.lock:
+            self.counts[outcome] += 1
+
+    def metrics(self):
+        with self.lock:
+            checked = self.counts['checked']
+            return {
+                'workers': self.workers,
+                'queue_size': self.queue_size,
+                'in_flight': self.in_flight,
+                'queued': max(self.in_flight - self.workers, 0),
+                'peak_in_flight': self.peak_in_flight,
+                'checked': checked,
+                'rejected': self.counts['rejected'],
+                'timed_out': self.counts['timed_out'],
+                'avg_wait_ms': round(self.wait_seconds / checked * 1000, 2) if checked else 0,
+                'avg_hash_ms': round(self.hash_seconds / checked * 1000, 2) if checked else 0,
+                'max_hash_ms': round(self.max_hash_seconds * 1000, 2),
+            }
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_password_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = PasswordPool(settings.LOGIN_HASH_WORKERS, settings.LOGIN_HASH_QUEUE, settings.LOGIN_HASH_WAIT)
+        return _pool
+
+
+@receiver(setting_changed)
+def reset_password_pool(setting, **kwargs):
+    global _pool
+    if setting in ('LOGIN_HASH_WORKERS', 'LOGIN_HASH_QUEUE', 'LOGIN_HASH_WAIT'):
+        with _pool_lock:
+            _pool = None
+
@@ -0,0 +1,7 @@
+from rest_framework_simplejwt.serializers import TokenRefreshSerializer
+
+from .tokens import CachedRefreshToken
+
+
+class CachedTokenRefreshSerializer(TokenRefreshSerializer):
+    token_class = CachedRefreshToken
@@ -0,0 +1,23 @@
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+
+from demo.cache import get_cache
+
+from .authentication import snapshot_key
+from .tokens import forget_live
+
+
+@receiver(post_save, sender=get_user_model())
+@receiver(post_delete, sender=get_user_model())
+def forget_user_snapshot(sender, instance, **kwargs):
+    transaction.on_commit(lambda: get_cache().delete(snapshot_key(instance.pk)), using=kwargs.get('using'))
+
+
+@receiver(post_save, sender=BlacklistedToken)
+def forget_blacklisted_token(sender, instance, **kwargs):
+    # Blacklisting from anywhere else (admin, logout) must also stop the
+    # cached check from vouching for the token.
+    forget_live(instance.token.jti)
@@ -1,3 +1,158 @@
-from django.test import TestCase
+from datetime import timedelta
+from io import StringIO
 
-# Create your tests here.
+from asgiref.sync import async_to_sync
+from django.contrib.auth.models import User
+from django.contrib.auth.signals import user_login_failed
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from rest_framework_simplejwt.utils import aware_utcnow
+
+from demo.testing import QueryBudgetTestCase
+
+from .passwords import get_password_pool
+from .tokens import CachedRefreshToken
+
+WORKER_CACHES = {
+    alias: {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': alias}
+    for alias in ['default', 'worker_a', 'worker_b']
+}
+
+
+class EndpointQueryBudgetTests(QueryBudgetTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user(username='buyer', password='secret')
+
+    def test_login(self):
+        with self.assertMaxQueries(2):
+            response = self.client.post('/auth/login/', {'username': 'buyer', 'password': 'secret'}, format='json')
+        self.assertEqual(response.status_code, 200)
+
+    def test_async_login(self):
+        post = async_to_sync(self.async_client.post)
+        with self.assertMaxQueries(2):
+            response = post('/auth/async/login/', {'username': 'buyer', 'password': 'secret'}, content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('access', response.json())
+
+        response = post('/auth/async/login/', {'username': 'buyer', 'password': 'wrong'}, content_type='application/json')
+        self.assertEqual(response.status_code, 401)
+
+    def test_refresh(self):
+        refresh = self.client.post('/auth/login/', {'username': 'buyer', 'password': 'secret'}, format='json').data['refresh']
+        with self.assertMaxQueries(12):
+            response = self.client.post('/auth/refresh/', {'refresh': refresh}, format='json')
+        self.assertEqual(response.status_code, 200)
+
+    def test_login_token_resolves_user_without_query(self):
+        access = self.client.post('/auth/login/', {'username': 'buyer', 'password': 'secret'}, format='json').data['access']
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {access}')
+        with self.assertMaxQueries(1):
+            response = self.client.get('/api/address/')
+        self.assertEqual(response.status_code, 200)
+
+    def test_token_is_refused_after_account_change(self):
+        access = self.client.post('/auth/login/', {'username': 'buyer', 'password': 'secret'}, format='json').data['access']
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {access}')
+        self.user.is_superuser = True
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.save()
+
+        response = self.client.get('/api/address/')
+
+        self.assertEqual(response.status_code, 401)
+
+
+class RefreshTokenBlacklistTests(QueryBudgetTestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = User.objects.create_user(username='buyer', password='secret')
+        self.refresh = self.client.post('/auth/login/', {'username': 'buyer', 'password': 'secret'}, format='json').data['refresh']
+
+    def test_rotated_token_is_refused(self):
+        self.assertEqual(self.client.post('/auth/refresh/', {'refresh': self.refresh}, format='json').status_code, 200)
+        response = self.client.post('/auth/refresh/', {'refresh': self.refresh}, format='json')
+        self.assertEqual(response.status_code, 401)
+
+    def test_blacklist_is_checked_in_database_without_cache(self):
+        CachedRefreshToken(self.refresh).blacklist()
+        cache.clear()
+        response = self.client.post('/auth/refresh/', {'refresh': self.refresh}, format='json')
+        self.assertEqual(response.status_code, 401)
+
+    def test_blacklisting_outside_refresh_drops_cached_token(self):
+        token = OutstandingToken.objects.get(jti=CachedRefreshToken(self.refresh)['jti'])
+        BlacklistedToken.objects.create(token=token)
+        response = self.client.post('/auth/refresh/', {'refresh': self.refresh}, format='json')
+        self.assertEqual(response.status_code, 401)
+
+    @override_settings(SINGLE_PROCESS=False, CACHES=WORKER_CACHES)
+    def test_token_rotated_on_another_worker_is_refused(self):
+        # Each alias stands in for one worker's process-local cache.
+        with override_settings(READ_CACHE_ALIAS='worker_a'):
+            refresh = self.client.post('/auth/login/', {'username': 'buyer', 'password': 'secret'}, format='json').data['refresh']
+        with override_settings(READ_CACHE_ALIAS='worker_b'):
+            self.assertEqual(self.client.post('/auth/refresh/', {'refresh': refresh}, format='json').status_code, 200)
+        with override_settings(READ_CACHE_ALIAS='worker_a'):
+            response = self.client.post('/auth/refresh/', {'refresh': refresh}, format='json')
+        self.assertEqual(response.status_code, 401)
+
+
+class PruneTokensTests(TestCase):
+    def test_prunes_only_expired_tokens(self):
+        now = aware_utcnow()
+        for i, expires_at in enumerate([now - timedelta(days=1)] * 5 + [now + timedelta(days=1)] * 2):
+            token = OutstandingToken.objects.create(jti=f'jti-{i}', token='', expires_at=expires_at)
+            BlacklistedToken.objects.create(token=token)
+
+        out = StringIO()
+        call_command('prune_tokens', batch_size=2, stdout=out)
+
+        self.assertIn('Deleted 5 expired tokens and 5 blacklist entries.', out.getvalue())
+        self.assertEqual(sorted(OutstandingToken.objects.values_list('jti', flat=True)), ['jti-5', 'jti-6'])
+        self.assertEqual(BlacklistedToken.objects.count(), 2)
+
+
+@override_settings(LOGIN_HASH_WORKERS=1, LOGIN_HASH_QUEUE=0)
+class LoginAdmissionTests(QueryBudgetTestCase):
+    def setUp(self):
+        super().setUp()
+        User.objects.create_user(username='buyer', password='secret')
+        self.admin = User.objects.create_superuser(username='admin', password='secret')
+
+    def test_logins_beyond_capacity_are_refused_fast(self):
+        pool = get_password_pool()
+        self.assertTrue(pool.slots.acquire(blocking=False))
+        try:
+            sync = self.client.post('/auth/login/', {'username': 'buyer', 'password': 'secret'}, format='json')
+            asynchronous = async_to_sync(self.async_client.post)(
+                '/auth/async/login/', {'username': 'buyer', 'password': 'secret'}, content_type='application/json',
+            )
+        finally:
+            pool.slots.release()
+
+        self.assertEqual((sync.status_code, asynchronous.status_code), (503, 503))
+        self.assertEqual(sync['Retry-After'], '1')
+        self.assertEqual(self.client.post('/auth/login/', {'username': 'buyer', 'password': 'secret'}, format='json').status_code, 200)
+
+        self.authenticate(self.admin)
+        metrics = self.client.get('/auth/login/metrics/').data
+        self.assertEqual((metrics['rejected'], metrics['checked'], metrics['in_flight']), (2, 1, 0))
+
+    def test_logins_go_through_the_authentication_backends(self):
+        failures = []
+        user_login_failed.connect(lambda credentials, **kwargs: failures.append(credentials['username']), weak=False,
+                                  dispatch_uid='test-login-failed')
+        self.addCleanup(user_login_failed.disconnect, dispatch_uid='test-login-failed')
+        User.objects.filter(username='buyer').update(is_active=False)
+
+        sync = self.client.post('/auth/login/', {'username': 'buyer', 'password': 'secret'}, format='json')
+        asynchronous = async_to_sync(self.async_client.post)(
+            '/auth/async/login/', {'username': 'nobody', 'password': 'secret'}, content_type='application/json',
+        )
+
+        self.assertEqual((sync.status_code, asynchronous.status_code), (401, 401))
+        self.assertEqual(failures, ['buyer', 'nobody'])
@@ -0,0 +1,66 @@
+"""
+Refresh tokens whose blacklist check is usually answered by the cache.
+
+Every refresh token issued here is recorded in the cache as live until it
+expires, and the record is dropped the moment the token is blacklisted. A
+token found live cannot be on the blacklist, so the refresh path skips the
+``token_blacklist`` tables. A token that isn't found, because its record was
+evicted, it predates the cache or it really is blacklisted, is checked
+against the database as before, so losing cache entries costs a query and
+never lets a revoked token through.
+
+Blacklisting only drops the record from the cache the blacklisting worker
+sees, so the record is trusted only when every worker sees that same cache:
+a shared backend, or ``SINGLE_PROCESS``. Otherwise every refresh goes to the
+database.
+"""
+import time
+
+from django.conf import settings
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from demo.cache import get_cache, is_shared_cache, record
+
+
+def live_token_key(jti):
+    return f'jwt:live:{jti}'
+
+
+def mark_live(token):
+    timeout = token['exp'] - int(time.time())
+    if timeout > 0:
+        get_cache().set(live_token_key(token[api_settings.JTI_CLAIM]), 1, timeout)
+
+
+def forget_live(jti):
+    get_cache().delete(live_token_key(jti))
+
+
+def trust_live_marks(cache):
+    return settings.SINGLE_PROCESS or is_shared_cache(cache)
+
+
+class CachedRefreshToken(RefreshToken):
+    def check_blacklist(self):
+        cache = get_cache()
+        if trust_live_marks(cache) and cache.get(live_token_key(self.payload[api_settings.JTI_CLAIM])) is not None:
+            record('token-blacklist', 'hit')
+            return
+        record('token-blacklist', 'miss')
+        super().check_blacklist()
+
+    def blacklist(self):
+        forget_live(self.payload[api_settings.JTI_CLAIM])
+        return super().blacklist()
+
+    def outstand(self):
+        outstanding = super().outstand()
+        mark_live(self)
+        return outstanding
+
+    @classmethod
+    def for_user(cls, user):
+        token = super().for_user(user)
+        mark_live(token)
+        return token
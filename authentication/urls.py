@@ -1,8 +1,11 @@
 from django.urls import path
-from .views import LoginView
+from .views import LoginView, LoginMetricsView
+from .async_views import AsyncLoginView
 from rest_framework_simplejwt.views import TokenRefreshView
 
 urlpatterns = [
     path('login/', LoginView.as_view(), name='login'),
+    path('login/metrics/', LoginMetricsView.as_view(), name='login_metrics'),
+    path('async/login/', AsyncLoginView.as_view(), name='async_login'),
     path('refresh/', TokenRefreshView.as_view(), name='token_refresh'),
-]
\ No newline at end of file
+]
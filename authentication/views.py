@@ -1,21 +1,47 @@
+from django.contrib.auth import authenticate
 from rest_framework.views import APIView
 from rest_framework.response import Response
 from rest_framework import status
-from django.contrib.auth import authenticate
-from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework.permissions import IsAuthenticated
+from .authentication import add_user_claims, cache_user_snapshot
+from .passwords import LoginOverloaded, get_password_pool
+from .tokens import CachedRefreshToken
+
+
+def issue_tokens(user):
+    refresh = add_user_claims(CachedRefreshToken.for_user(user), user)
+    cache_user_snapshot(user)
+    return {
+        'refresh': str(refresh),
+        'access': str(refresh.access_token),
+    }
+
 
 class LoginView(APIView):
     def post(self, request):
         username = request.data.get('username')
         password = request.data.get('password')
 
-        user = authenticate(username=username, password=password)
+        if not username or not password:
+            return Response({'error': 'Invalid Credentials'}, status=status.HTTP_401_UNAUTHORIZED)
+
+        try:
+            # Blocks this thread for the pooled hash; AsyncLoginView doesn't.
+            user = authenticate(request, username=username, password=password)
+        except LoginOverloaded as exc:
+            return Response({'error': exc.message}, status=status.HTTP_503_SERVICE_UNAVAILABLE,
+                            headers={'Retry-After': str(exc.retry_after)})
 
         if user is not None:
-            refresh = RefreshToken.for_user(user)
-            return Response({
-                'refresh': str(refresh),
-                'access': str(refresh.access_token),
-            })
+            return Response(issue_tokens(user))
         else:
             return Response({'error': 'Invalid Credentials'}, status=status.HTTP_401_UNAUTHORIZED)
+
+
+class LoginMetricsView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        if not request.user.is_superuser:
+            return Response({'error': 'Permission Denied.'}, status=status.HTTP_403_FORBIDDEN)
+        return Response(get_password_pool().metrics(), status=status.HTTP_200_OK)
@@ -0,0 +1,46 @@
+import json
+
+from django.contrib.auth.models import AnonymousUser
+from django.http import JsonResponse
+from django.utils.decorators import classonlymethod
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
+from rest_framework import status
+from rest_framework.exceptions import APIException, NotAuthenticated, ParseError
+from rest_framework.utils.encoders import JSONEncoder
+
+from authentication.authentication import AsyncJWTAuthentication
+
+
+class AsyncAPIView(View):
+    """
+    Minimal async counterpart of DRF's APIView for read paths served under
+    ASGI: JWT authentication through the async ORM, DRF-style JSON errors,
+    and no thread hop per request. Handlers must be ``async def``.
+    """
+    authentication_class = AsyncJWTAuthentication
+    authentication_required = True
+
+    @classonlymethod
+    def as_view(cls, **initkwargs):
+        return csrf_exempt(super().as_view(**initkwargs))
+
+    async def dispatch(self, request, *args, **kwargs):
+        try:
+            auth = await self.authentication_class().aauthenticate(request)
+            request.user = auth[0] if auth else AnonymousUser()
+            if self.authentication_required and auth is None:
+                raise NotAuthenticated()
+            return await super().dispatch(request, *args, **kwargs)
+        except APIException as exc:
+            detail = exc.detail if isinstance(exc.detail, (dict, list)) else {'detail': exc.detail}
+            return self.respond(detail, status=exc.status_code)
+
+    def parse_json(self, request):
+        try:
+            return json.loads(request.body or b'{}')
+        except ValueError as exc:
+            raise ParseError(f'JSON parse error - {exc}')
+
+    def respond(self, data, status=status.HTTP_200_OK):
+        return JsonResponse(data, status=status, encoder=JSONEncoder, safe=False)
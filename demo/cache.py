@@ -0,0 +1,172 @@
+"""
+Versioned read-through cache shared by the catalog and coupon endpoints.
+
+Every cached read is keyed on the current generation of the models it was
+built from. Saving or deleting one of those models bumps its generation, so
+old entries simply stop being addressed and age out on their own.
+
+Generations and rebuild locks only reach every worker through a cache they
+all share, so a process-local backend fails the system checks unless
+``SINGLE_PROCESS`` says one process serves every request.
+"""
+import hashlib
+import threading
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.dummy import DummyCache
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.checks import Error, Tags, register
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+
+from .routers import use_primary
+
+_metrics = Counter()
+_metrics_lock = threading.Lock()
+
+
+def get_cache():
+    return caches[settings.READ_CACHE_ALIAS]
+
+
+def is_shared_cache(cache):
+    return not isinstance(cache, (LocMemCache, DummyCache))
+
+
+@register(Tags.caches)
+def check_shared_read_cache(app_configs, **kwargs):
+    if settings.SINGLE_PROCESS or is_shared_cache(get_cache()):
+        return []
+    return [Error(
+        f"The {settings.READ_CACHE_ALIAS!r} cache is local to each process, so what one worker writes "
+        f"to it (generation bumps, rebuild locks) never reaches the others.",
+        hint="Point CACHE_BACKEND at Redis, Memcached or the file backend, or set SINGLE_PROCESS=True "
+             "when one process serves every request.",
+        id='demo.E001',
+    )]
+
+
+def generation_key(model):
+    return f'gen:{model._meta.label_lower}'
+
+
+def _initial_generation():
+    # Seeded from the clock so a generation key that was evicted never comes
+    # back with a value that still addresses entries built before the eviction.
+    return int(time.time() * 1000)
+
+
+def get_generations(models):
+    return get_key_generations([generation_key(model) for model in models])
+
+
+def get_key_generations(keys):
+    cache = get_cache()
+    generations = cache.get_many(keys)
+    for key in keys:
+        if key not in generations:
+            cache.add(key, _initial_generation(), None)
+            generations[key] = cache.get(key)
+    return [generations[key] for key in keys]
+
+
+def bump_generation(*models):
+    bump_key_generations([generation_key(model) for model in models])
+
+
+def bump_key_generations(keys):
+    cache = get_cache()
+    for key in keys:
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.add(key, _initial_generation(), None)
+
+
+def make_key(namespace, models, params=None):
+    versions = '.'.join(str(generation) for generation in get_generations(models))
+    digest = hashlib.md5(repr(params).encode('utf-8')).hexdigest()
+    return f'read:{namespace}:{versions}:{digest}'
+
+
+def record(namespace, outcome):
+    with _metrics_lock:
+        _metrics[(namespace, outcome)] += 1
+
+
+def cache_metrics():
+    with _metrics_lock:
+        snapshot = dict(_metrics)
+    metrics = {}
+    for (namespace, outcome), count in snapshot.items():
+        metrics.setdefault(namespace, {})[outcome] = count
+    return metrics
+
+
+def _wait_for(cache, key):
+    deadline = time.monotonic() + settings.READ_CACHE_LOCK_WAIT
+    while time.monotonic() < deadline:
+        time.sleep(0.05)
+        entry = cache.get(key)
+        if entry is not None:
+            return entry
+    return None
+
+
+def cached_read(namespace, models, build, params=None, timeout=None):
+    """
+    Return ``build()`` through the cache, rebuilding at most once at a time.
+
+    Entries outlive their freshness by ``READ_CACHE_STALE_GRACE`` seconds.
+    When an entry goes stale the worker that wins the rebuild lock refreshes
+    it while everybody else keeps serving the stale value; on a cold miss the
+    losers wait briefly for the winner instead of all hitting the database.
+    """
+    cache = get_cache()
+    timeout = settings.READ_CACHE_TIMEOUT if timeout is None else timeout
+    key = make_key(namespace, models, params)
+    lock_key = f'lock:{key}'
+
+    entry = cache.get(key)
+    if entry is not None:
+        fresh_until, value = entry
+        if fresh_until > time.time():
+            record(namespace, 'hit')
+            return value
+        locked = cache.add(lock_key, 1, settings.READ_CACHE_LOCK_TIMEOUT)
+        if not locked:
+            record(namespace, 'stale')
+            return value
+    else:
+        locked = cache.add(lock_key, 1, settings.READ_CACHE_LOCK_TIMEOUT)
+        if not locked:
+            entry = _wait_for(cache, key)
+            if entry is not None:
+                record(namespace, 'hit')
+                return entry[1]
+
+    record(namespace, 'miss')
+    try:
+        # Built from the primary: a lagging replica could otherwise store
+        # pre-change data under the generation the change just bumped.
+        with use_primary():
+            value = build()
+        cache.set(key, (time.time() + timeout, value), timeout + settings.READ_CACHE_STALE_GRACE)
+    finally:
+        if locked:
+            cache.delete(lock_key)
+    return value
+
+
+def _bump_on_commit(sender, **kwargs):
+    transaction.on_commit(lambda: bump_generation(sender), using=kwargs.get('using'))
+
+
+def invalidate_on_change(*models):
+    for model in models:
+        uid = f'read-cache:{model._meta.label_lower}'
+        post_save.connect(_bump_on_commit, sender=model, dispatch_uid=f'{uid}:save', weak=False)
+        post_delete.connect(_bump_on_commit, sender=model, dispatch_uid=f'{uid}:delete', weak=False)
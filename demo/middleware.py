@@ -0,0 +1,184 @@
+import logging
+import time
+from collections import Counter
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connections
+
+from authentication.authentication import token_user_id
+
+from .routers import is_pinned, pick_replica, pin_to_primary, use_read_alias
+
+logger = logging.getLogger('demo.queries')
+
+# The recorder of the request being handled. sync_to_async copies it into the
+# thread that runs the ORM calls of an async view.
+current_recorder = ContextVar('current_recorder', default=None)
+
+
+class QueryRecorder:
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.statements = Counter()
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - start
+            self.count += 1
+            self.statements[sql] += 1
+
+    @property
+    def duplicates(self):
+        return sum(count - 1 for count in self.statements.values() if count > 1)
+
+
+def record_query(execute, sql, params, many, context):
+    recorder = current_recorder.get()
+    if recorder is None:
+        return execute(sql, params, many, context)
+    return recorder(execute, sql, params, many, context)
+
+
+def install_query_recorder():
+    # Connections are per thread, so this has to run in the thread that will
+    # use them. The wrapper stays on for the life of the connection object.
+    for connection in connections.all():
+        if record_query not in connection.execute_wrappers:
+            connection.execute_wrappers.append(record_query)
+
+
+class QueryBudgetMiddleware:
+    """
+    Report how many queries each request ran, how long they took and how many
+    repeated an earlier statement (the usual sign of an N+1), as response
+    headers, and log requests that go over ``QUERY_BUDGET``.
+
+    Queries run while a streaming response is consumed happen after the view
+    returns and aren't counted. Under ASGI the queries run in the thread
+    sync_to_async hands them to, so the recorder is installed there.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not settings.QUERY_INSTRUMENTATION:
+            return self.get_response(request)
+
+        install_query_recorder()
+        recorder = QueryRecorder()
+        token = current_recorder.set(recorder)
+        try:
+            response = self.get_response(request)
+        finally:
+            current_recorder.reset(token)
+        return self.report(request, response, recorder)
+
+    async def __acall__(self, request):
+        if not settings.QUERY_INSTRUMENTATION:
+            return await self.get_response(request)
+
+        await sync_to_async(install_query_recorder)()
+        recorder = QueryRecorder()
+        token = current_recorder.set(recorder)
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_recorder.reset(token)
+        return self.report(request, response, recorder)
+
+    def report(self, request, response, recorder):
+        response['X-Query-Count'] = str(recorder.count)
+        response['X-Query-Time-Ms'] = f'{recorder.duration * 1000:.2f}'
+        response['X-Query-Duplicates'] = str(recorder.duplicates)
+
+        if recorder.count > settings.QUERY_BUDGET or recorder.duplicates:
+            view_name = getattr(request.resolver_match, 'view_name', None) or request.path
+            logger.warning(
+                '%s %s ran %d queries (%d duplicated) in %.2fms',
+                request.method, view_name, recorder.count, recorder.duplicates, recorder.duration * 1000,
+            )
+        return response
+
+
+class ReplicaRoutingMiddleware:
+    """
+    Route the reads of safe-method requests to a replica (see demo.routers).
+
+    A request from a user who wrote within ``REPLICA_STICKY_SECONDS`` reads
+    from the primary. Every unsafe-method request by an authenticated user
+    starts that window again, whatever its outcome, since a failed request
+    may still have written something.
+    """
+
+    sync_capable = True
+    async_capable = True
+    SAFE_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if not settings.DATABASE_REPLICAS:
+            return self.get_response(request)
+
+        user_id = token_user_id(request)
+        alias = self.read_alias(request, user_id)
+        with use_read_alias(alias):
+            response = self.get_response(request)
+        return self.finish(request, response, user_id, alias)
+
+    async def __acall__(self, request):
+        if not settings.DATABASE_REPLICAS:
+            return await self.get_response(request)
+
+        user_id = token_user_id(request)
+        alias = await sync_to_async(self.read_alias)(request, user_id)
+        with use_read_alias(alias):
+            response = await self.get_response(request)
+        return await sync_to_async(self.finish)(request, response, user_id, alias)
+
+    def read_alias(self, request, user_id):
+        if request.method not in self.SAFE_METHODS:
+            return None
+        if user_id is not None and is_pinned(user_id):
+            return None
+        return pick_replica()
+
+    def finish(self, request, response, user_id, alias):
+        if request.method not in self.SAFE_METHODS and user_id is not None:
+            pin_to_primary(user_id)
+        if alias is not None and response.streaming and not response.is_async:
+            # Streamed bodies run their queries after the view has returned.
+            response.streaming_content = stream_from(alias, response.streaming_content)
+        return response
+
+
+_DONE = object()
+
+
+def stream_from(alias, content):
+    iterator = iter(content)
+    while True:
+        with use_read_alias(alias):
+            chunk = next(iterator, _DONE)
+        if chunk is _DONE:
+            return
+        yield chunk
@@ -0,0 +1,144 @@
+"""
+Read-replica routing.
+
+ReplicaRoutingMiddleware picks the database a request reads from and
+ReplicaRouter applies it: writes, and every read that isn't routed, go to
+``default``. Only safe-method requests are routed to a replica (one of
+``DATABASE_REPLICAS``), and only when
+
+- the user hasn't written anything in the last ``REPLICA_STICKY_SECONDS``
+  (read-your-writes: a just-placed order shows up in the order list), and
+- a replica's measured lag is within ``REPLICA_MAX_LAG`` seconds. Lag is
+  checked at most every ``REPLICA_LAG_CHECK_INTERVAL`` seconds per process; a
+  replica that lags or can't be reached is skipped until the next check, and
+  with no healthy replica reads go to the primary.
+
+Pins live in the read cache, which every worker must share (a process-local
+one fails the startup checks unless ``SINGLE_PROCESS``), so a user's next
+read is kept on the primary whichever worker serves it.
+
+Code that reads to cache or to write must see the primary's data whatever the
+request was routed to; it runs under ``use_primary()``.
+"""
+import random
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.signals import setting_changed
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+from django.dispatch import receiver
+
+_read_alias = ContextVar('read_alias', default=None)
+
+# Replayed everything received: no lag, however long ago the last write was.
+POSTGRES_LAG_SQL = """
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() OR pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+"""
+
+
+def get_read_alias():
+    return _read_alias.get()
+
+
+@contextmanager
+def use_read_alias(alias):
+    token = _read_alias.set(alias)
+    try:
+        yield
+    finally:
+        _read_alias.reset(token)
+
+
+def use_primary():
+    return use_read_alias(None)
+
+
+def replica_lag(alias):
+    connection = connections[alias]
+    if connection.vendor != 'postgresql':
+        return 0.0
+    with connection.cursor() as cursor:
+        cursor.execute(POSTGRES_LAG_SQL)
+        return float(cursor.fetchone()[0])
+
+
+class ReplicaHealth:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.checked = {}
+
+    def is_healthy(self, alias):
+        now = time.monotonic()
+        with self.lock:
+            entry = self.checked.get(alias)
+        if entry is not None and now - entry[0] < settings.REPLICA_LAG_CHECK_INTERVAL:
+            return entry[1]
+
+        try:
+            healthy = replica_lag(alias) <= settings.REPLICA_MAX_LAG
+        except DatabaseError:
+            connections[alias].close()
+            healthy = False
+        with self.lock:
+            self.checked[alias] = (now, healthy)
+        return healthy
+
+    def reset(self):
+        with self.lock:
+            self.checked.clear()
+
+
+replica_health = ReplicaHealth()
+
+
+@receiver(setting_changed)
+def reset_replica_health(setting, **kwargs):
+    if setting in ('DATABASE_REPLICAS', 'REPLICA_MAX_LAG', 'REPLICA_LAG_CHECK_INTERVAL'):
+        replica_health.reset()
+
+
+def pin_key(user_id):
+    return f'db:primary:{user_id}'
+
+
+def pin_cache():
+    # demo.cache's get_cache(); not imported, demo.cache imports this module.
+    return caches[settings.READ_CACHE_ALIAS]
+
+
+def pin_to_primary(user_id):
+    pin_cache().set(pin_key(user_id), 1, settings.REPLICA_STICKY_SECONDS)
+
+
+def is_pinned(user_id):
+    return pin_cache().get(pin_key(user_id)) is not None
+
+
+def pick_replica():
+    healthy = [alias for alias in settings.DATABASE_REPLICAS if replica_health.is_healthy(alias)]
+    return random.choice(healthy) if healthy else None
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        alias = _read_alias.get()
+        # Reads inside a transaction belong with its writes.
+        if alias is None or connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        return alias
+
+    def db_for_write(self, model, **hints):
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        databases = {DEFAULT_DB_ALIAS, *settings.DATABASE_REPLICAS}
+        if obj1._state.db in databases and obj2._state.db in databases:
+            return True
+        return None
@@ -36,11 +36,14 @@ INSTALLED_APPS = [
     'django.contrib.sessions',
     'django.contrib.messages',
     'django.contrib.staticfiles',
+    'django.contrib.postgres',
     'rest_framework',
     'rest_framework_simplejwt.token_blacklist',
     'app1',
     'drf_spectacular',
     'discounts',
+    'authentication',
+    'reports',
 ]
 
 MIDDLEWARE = [
@@ -51,8 +54,14 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'demo.middleware.QueryBudgetMiddleware',
+    'demo.middleware.ReplicaRoutingMiddleware',
 ]
 
+# Per-request query count, DB time and duplicate SQL headers (see demo.middleware)
+QUERY_INSTRUMENTATION = (os.getenv('QUERY_INSTRUMENTATION') or str(DEBUG)) == 'True'
+QUERY_BUDGET = int(os.getenv('QUERY_BUDGET') or 20)
+
 ROOT_URLCONF = 'demo.urls'
 
 TEMPLATES = [
@@ -91,9 +100,79 @@ DATABASES = {
         'PASSWORD': os.getenv('DB_PASSWORD'),
         'HOST': os.getenv('DB_HOST'),
         'PORT': os.getenv('DB_PORT'),
+        'CONN_HEALTH_CHECKS': True,
     }
 }
 
+# Connection reuse. With DB_POOL on (needs psycopg 3 with the pool extra) every
+# worker process keeps its own pool per database, so size DB_POOL_MAX_SIZE to
+# the worker's threads and keep workers * DB_POOL_MAX_SIZE under each server's
+# max_connections. With it off each thread keeps its connection for
+# DB_CONN_MAX_AGE seconds. Either way a reused connection is checked before use.
+DB_POOL = (os.getenv('DB_POOL') or 'True') == 'True'
+if DB_POOL:
+    DATABASES['default']['OPTIONS'] = {
+        'pool': {
+            'min_size': int(os.getenv('DB_POOL_MIN_SIZE') or 2),            # connections opened when the worker starts
+            'max_size': int(os.getenv('DB_POOL_MAX_SIZE') or 10),           # connections per worker process
+            'timeout': float(os.getenv('DB_POOL_TIMEOUT') or 10),           # seconds a request waits for a free connection
+            'max_idle': float(os.getenv('DB_POOL_MAX_IDLE') or 300),        # seconds before idle connections above min_size close
+            'max_lifetime': float(os.getenv('DB_POOL_MAX_LIFETIME') or 1800),  # seconds before a connection is replaced
+        },
+    }
+else:
+    DATABASES['default']['CONN_MAX_AGE'] = int(os.getenv('DB_CONN_MAX_AGE') or 60)  # seconds a thread keeps its connection
+
+# Read replicas: comma-separated hosts that share the primary's database name
+# and credentials. Safe-method requests read from them (see demo.routers).
+DATABASE_REPLICAS = []
+for index, host in enumerate(host for host in (os.getenv('DB_REPLICA_HOSTS') or '').split(',') if host.strip()):
+    alias = f'replica_{index}'
+    DATABASES[alias] = {**DATABASES['default'], 'HOST': host.strip(), 'TEST': {'MIRROR': 'default'}}
+    DATABASE_REPLICAS.append(alias)
+
+DATABASE_ROUTERS = ['demo.routers.ReplicaRouter']
+REPLICA_STICKY_SECONDS = int(os.getenv('REPLICA_STICKY_SECONDS') or 15)       # a user's reads stay on the primary this long after a write
+REPLICA_MAX_LAG = float(os.getenv('REPLICA_MAX_LAG') or 5)                     # seconds behind the primary before a replica is skipped
+REPLICA_LAG_CHECK_INTERVAL = int(os.getenv('REPLICA_LAG_CHECK_INTERVAL') or 5)  # seconds between lag checks per replica
+
+# Cache
+# https://docs.djangoproject.com/en/5.2/topics/cache/
+
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv('CACHE_BACKEND') or 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': os.getenv('CACHE_LOCATION') or 'redis://127.0.0.1:6379/0',
+    }
+}
+
+# Every worker must share the cache (checked at startup, see demo.cache); a
+# process-local backend such as LocMemCache is only allowed when one process
+# serves every request, e.g. runserver.
+SINGLE_PROCESS = (os.getenv('SINGLE_PROCESS') or 'False') == 'True'
+
+READ_CACHE_ALIAS = 'default'
+READ_CACHE_TIMEOUT = int(os.getenv('READ_CACHE_TIMEOUT') or 300)       # seconds an entry is served as fresh
+READ_CACHE_STALE_GRACE = int(os.getenv('READ_CACHE_STALE_GRACE') or 60)  # stale entries served while one worker rebuilds
+READ_CACHE_LOCK_TIMEOUT = 10
+READ_CACHE_LOCK_WAIT = 2
+
+# Rendering processes per web worker, shared by every invoice export it serves
+INVOICE_RENDER_WORKERS = int(os.getenv('INVOICE_RENDER_WORKERS') or 2)
+
+# Seconds an authenticated user's snapshot is trusted without loading the row
+AUTH_USER_SNAPSHOT_TTL = int(os.getenv('AUTH_USER_SNAPSHOT_TTL') or 300)
+
+# Login hashes passwords in a bounded pool; logins beyond workers + queue get a 503
+AUTHENTICATION_BACKENDS = ['authentication.backends.PooledModelBackend']
+LOGIN_HASH_WORKERS = int(os.getenv('LOGIN_HASH_WORKERS') or 4)
+LOGIN_HASH_QUEUE = int(os.getenv('LOGIN_HASH_QUEUE') or 32)
+LOGIN_HASH_WAIT = float(os.getenv('LOGIN_HASH_WAIT') or 2)   # seconds a check may wait for a worker
+
+# Number of counter rows used to spread usage writes for unlimited coupons (0 = off)
+COUPON_COUNTER_SHARDS = int(os.getenv('COUPON_COUNTER_SHARDS') or 0)
+COUPON_INDEX_TTL = int(os.getenv('COUPON_INDEX_TTL') or 60)  # seconds the active coupon snapshot is served from memory
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -130,6 +209,27 @@ USE_TZ = True
 
 STATIC_URL = 'static/'
 
+# File storage
+# https://docs.djangoproject.com/en/5.2/ref/settings/#storages
+
+STORAGES = {
+    'default': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    },
+    'staticfiles': {
+        'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage',
+    },
+    # Rendered invoice PDFs, addressed by a hash of their content. Point this
+    # at any storage backend shared by all workers.
+    'invoices': {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+        'OPTIONS': {
+            'location': os.getenv('INVOICE_STORAGE_ROOT') or BASE_DIR / 'invoices',
+            'allow_overwrite': True,
+        },
+    },
+}
+
 # Default primary key field type
 # https://docs.djangoproject.com/en/5.2/ref/settings/#default-auto-field
 
@@ -137,7 +237,7 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'authentication.authentication.CachedJWTAuthentication',
     ),
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
 }
@@ -147,4 +247,5 @@ SIMPLE_JWT = {
     'REFRESH_TOKEN_LIFETIME': timedelta(days=7),  # Refresh Token → 7 Days (or as needed)
     'ROTATE_REFRESH_TOKENS': True,
     'BLACKLIST_AFTER_ROTATION': True,
+    'TOKEN_REFRESH_SERIALIZER': 'authentication.serializers.CachedTokenRefreshSerializer',
 }
\ No newline at end of file
@@ -0,0 +1,60 @@
+"""
+Settings for running the test suite against SQLite:
+
+    python manage.py test --settings=demo.test_settings
+"""
+from .settings import *  # noqa: F401,F403
+
+SECRET_KEY = SECRET_KEY or 'test-secret-key'
+
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': BASE_DIR / 'db.sqlite3',
+        # BEGIN IMMEDIATE serialises writers the way row locks do on
+        # PostgreSQL, and the timeout makes concurrent tests wait instead of
+        # failing with "database is locked".
+        'OPTIONS': {
+            'timeout': 20,
+            'transaction_mode': 'IMMEDIATE',
+        },
+        # A file rather than the in-memory default so threads share it.
+        'TEST': {
+            'NAME': BASE_DIR / 'test_db.sqlite3',
+        },
+    },
+    # A second file standing in for a replica. It gets the schema but never
+    # the primary's rows, so a read served from it is easy to tell apart.
+    # Routing is off unless a test turns it on with DATABASE_REPLICAS.
+    'replica': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': BASE_DIR / 'db_replica.sqlite3',
+        'OPTIONS': {
+            'timeout': 20,
+        },
+        'TEST': {
+            'NAME': BASE_DIR / 'test_db_replica.sqlite3',
+        },
+    },
+}
+
+DATABASE_REPLICAS = []
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'test',
+    }
+}
+SINGLE_PROCESS = True
+
+STORAGES = {
+    **STORAGES,
+    'invoices': {
+        'BACKEND': 'django.core.files.storage.InMemoryStorage',
+    },
+}
+
+PASSWORD_HASHERS = [
+    'django.contrib.auth.hashers.MD5PasswordHasher',
+]
@@ -0,0 +1,74 @@
+import re
+from contextlib import contextmanager
+
+from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APITestCase
+
+from authentication.authentication import add_user_claims, cache_user_snapshot
+from authentication.tokens import CachedRefreshToken
+
+# A plan step that reads every row of a table: no index, no rowid lookup.
+FULL_SCAN = re.compile(r'^SCAN (\w+)(?: AS \w+)?$')
+SUBQUERY_ALIAS = re.compile(r'[A-Z]\d+')
+
+
+class QueryBudgetTestCase(APITestCase):
+    """
+    Base class for the per-endpoint query budget tests. Budgets are maxima:
+    going over one fails the test with the offending SQL, coming in under it
+    is fine and is the cue to tighten the number.
+    """
+
+    def setUp(self):
+        cache.clear()
+
+    def authenticate(self, user):
+        # Same token and warm user snapshot that LoginView hands out.
+        token = add_user_claims(CachedRefreshToken.for_user(user), user).access_token
+        cache_user_snapshot(user)
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+
+    @contextmanager
+    def assertMaxQueries(self, budget):
+        with CaptureQueriesContext(connection) as queries:
+            yield queries
+        if len(queries) > budget:
+            statements = '\n'.join(f'  {query["sql"]}' for query in queries.captured_queries)
+            self.fail(f'{len(queries)} queries executed, budget is {budget}:\n{statements}')
+
+    def consume(self, response):
+        # Streaming responses only hit the database while they are iterated.
+        if response.streaming:
+            b''.join(response.streaming_content)
+        return response
+
+    @contextmanager
+    def assertQueriesUseIndexes(self, allow_scans=()):
+        """
+        Fail if a SELECT, UPDATE or DELETE run inside the block reads a table
+        without an index, as told by SQLite's EXPLAIN QUERY PLAN. Tables in
+        ``allow_scans`` are expected to be read whole.
+        """
+        with CaptureQueriesContext(connection) as queries:
+            yield queries
+        if connection.vendor != 'sqlite':
+            return
+        # Scans of derived tables (window function subqueries) are not scans
+        # of a table; subquery aliases like U0 stand for real tables.
+        tables = set(connection.introspection.table_names()) - set(allow_scans)
+        for query in queries.captured_queries:
+            sql = query['sql']
+            if not sql.startswith(('SELECT', 'UPDATE', 'DELETE')):
+                continue
+            with connection.cursor() as cursor:
+                cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+                plan = [row[3] for row in cursor.fetchall()]
+            scans = [
+                detail for detail in plan
+                if (match := FULL_SCAN.match(detail))
+                and (match.group(1) in tables or SUBQUERY_ALIAS.fullmatch(match.group(1)))
+            ]
+            if scans:
+                self.fail(f'{", ".join(scans)} in:\n  {sql}\nplan:\n  ' + '\n  '.join(plan))
@@ -8,6 +8,7 @@ urlpatterns = [
     path('auth/', include('authentication.urls')),
     path('api/', include('app1.urls')),
     path('discount/', include('discounts.urls')),
+    path('reports/', include('reports.urls')),
 
     path('api/schema/', SpectacularAPIView.as_view(), name='schema'),
 
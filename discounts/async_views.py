@@ -0,0 +1,33 @@
+from asgiref.sync import sync_to_async
+from rest_framework import status
+
+from demo.async_views import AsyncAPIView
+
+from .index import lookup_coupon
+from .serializers import CouponValidateSerializer
+from .utils import coupon_usage, validate_code
+
+
+class AsyncValidateCouponAPIView(AsyncAPIView):
+    async def post(self, request):
+        serializer = CouponValidateSerializer(data=self.parse_json(request))
+        if not serializer.is_valid():
+            return self.respond(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        code = serializer.validated_data['code']
+        coupon = await sync_to_async(lookup_coupon)(code)
+
+        is_valid, result = validate_code(coupon)
+        if not is_valid:
+            return self.respond({"message": result}, status=status.HTTP_400_BAD_REQUEST)
+
+        used = await coupon_usage(coupon, request.user).afirst()
+        if used is None:
+            return self.respond({"message": "Coupon usage limit reached."}, status=status.HTTP_400_BAD_REQUEST)
+        if used:
+            return self.respond({'detail': 'You have already used this coupon.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        return self.respond({
+            'message': 'Coupon is valid.',
+            'discount_percent': coupon.discount_percent
+        })
@@ -0,0 +1,65 @@
+"""
+Per-process snapshot of the current active coupon for each code.
+
+Coupon validation runs on every cart page view, so lookups are answered from
+memory. The snapshot holds every active coupon, which means a code missing
+from it is unknown without asking the database: guessing codes costs nothing
+however many different ones are tried. It is reloaded, in one query, when the
+Coupon generation changes or after ``COUPON_INDEX_TTL`` seconds.
+
+The Coupon generation from ``demo.cache`` is bumped by any worker's Coupon
+save, delete or redemption. It lives in the shared read cache (process-local
+caches fail the startup checks), so changes retire the snapshot in every
+process and not just the one that made them. Cached coupons carry whatever
+``usage_count`` they were loaded with; usage limits are always checked
+against the database.
+"""
+import threading
+import time
+
+from django.conf import settings
+
+from demo.cache import get_generations, record
+from demo.routers import use_primary
+
+from .models import Coupon
+
+_snapshot = None
+_lock = threading.Lock()
+
+
+def lookup_coupon(code):
+    return get_active_coupons().get(code)
+
+
+def get_active_coupons():
+    global _snapshot
+    generation = get_generations([Coupon])[0]
+    coupons = _current(generation)
+    if coupons is None:
+        with _lock:
+            # Another thread may have reloaded it while this one waited.
+            coupons = _current(generation)
+            if coupons is None:
+                record('coupon-index', 'miss')
+                with use_primary():
+                    # Oldest first, so the newest active coupon wins for a
+                    # code where the unique constraint is missing (MySQL).
+                    coupons = {coupon.code: coupon for coupon in Coupon.objects.filter(is_active=True).order_by('created_at')}
+                _snapshot = (time.monotonic() + settings.COUPON_INDEX_TTL, generation, coupons)
+                return coupons
+    record('coupon-index', 'hit')
+    return coupons
+
+
+def _current(generation):
+    snapshot = _snapshot
+    if snapshot is not None and snapshot[0] > time.monotonic() and snapshot[1] == generation:
+        return snapshot[2]
+    return None
+
+
+def clear_coupon_index():
+    global _snapshot
+    with _lock:
+        _snapshot = None
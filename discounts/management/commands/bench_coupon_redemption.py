@@ -0,0 +1,73 @@
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+
+from discounts.models import Coupon
+from discounts.utils import CouponUnavailable, redeem_coupon
+
+
+class Command(BaseCommand):
+    help = (
+        "Redeem one coupon from many concurrent buyers and report throughput, latency and whether the "
+        "usage limit held. Creates throwaway users and counts real redemptions against the coupon; "
+        "run against a copy of production data."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('code', help="Code of the active coupon to redeem.")
+        parser.add_argument('--buyers', type=int, default=500)
+        parser.add_argument('--threads', type=int, default=32)
+
+    def handle(self, *args, **options):
+        coupon = Coupon.objects.filter(is_active=True, code=options['code']).order_by('-created_at').first()
+        if coupon is None:
+            raise CommandError(f"No active coupon with code {options['code']!r}.")
+
+        prefix = f'bench-coupon-{int(time.time())}'
+        User.objects.bulk_create(User(username=f'{prefix}-{i}') for i in range(options['buyers']))
+        users = list(User.objects.filter(username__startswith=prefix))
+        before = coupon.total_usage_count()
+        outcomes = []
+        outcomes_lock = threading.Lock()
+
+        def redeem(user):
+            start = time.perf_counter()
+            try:
+                with transaction.atomic():
+                    redeem_coupon(coupon, user)
+                outcome = 'redeemed'
+            except CouponUnavailable as exc:
+                outcome = exc.message
+            finally:
+                connection.close()
+            with outcomes_lock:
+                outcomes.append((outcome, time.perf_counter() - start))
+
+        started = time.perf_counter()
+        try:
+            with ThreadPoolExecutor(max_workers=options['threads']) as pool:
+                list(pool.map(redeem, users))
+            elapsed = time.perf_counter() - started
+            coupon.refresh_from_db()
+            after = coupon.total_usage_count()
+        finally:
+            User.objects.filter(username__startswith=prefix).delete()
+
+        latencies = sorted(latency for _, latency in outcomes)
+        redeemed = sum(1 for outcome, _ in outcomes if outcome == 'redeemed')
+        self.stdout.write(f"redemptions/s: {len(outcomes) / elapsed:.0f}")
+        self.stdout.write(f"p50 ms: {statistics.median(latencies) * 1000:.1f}")
+        self.stdout.write(f"p95 ms: {latencies[int(len(latencies) * 0.95) - 1] * 1000:.1f}")
+        for outcome in sorted({outcome for outcome, _ in outcomes}):
+            self.stdout.write(f"{outcome}: {sum(1 for o, _ in outcomes if o == outcome)}")
+
+        if after - before != redeemed:
+            raise CommandError(f"Counted {after - before} uses for {redeemed} redemptions.")
+        if coupon.usage_limit and after > coupon.usage_limit:
+            raise CommandError(f"Usage limit {coupon.usage_limit} exceeded: {after}.")
+        self.stdout.write(self.style.SUCCESS("Usage count matches redemptions and the limit held."))
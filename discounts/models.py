@@ -12,6 +12,18 @@ class Coupon(models.Model):
     usage_count = models.PositiveIntegerField(default=0)
     is_active = models.BooleanField(default=True)
     created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['created_at', 'id'], name='coupon_created_at_id_idx'),
+            models.Index(fields=['code', 'is_active', 'created_at'], name='coupon_code_active_created_idx'),
+        ]
+        constraints = [
+            # At most one active coupon per code. Backends without partial
+            # indexes (MySQL) skip this and rely on the serializer check.
+            models.UniqueConstraint(fields=['code'], condition=models.Q(is_active=True),
+                                    name='coupon_unique_active_code'),
+        ]
     
     def __str__(self):
         return self.code
@@ -27,6 +39,12 @@ class Coupon(models.Model):
             return False
         return True
 
+    def total_usage_count(self):
+        # Unlimited coupons may be counted in CouponCounterShard rows instead
+        # of usage_count when COUPON_COUNTER_SHARDS is enabled.
+        sharded = self.counter_shards.aggregate(total=models.Sum('count'))['total'] or 0
+        return self.usage_count + sharded
+
 class CouponUsage(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='coupon_usages')
@@ -36,4 +54,16 @@ class CouponUsage(models.Model):
         unique_together = ('user', 'coupon')  
 
     def __str__(self):
-        return f"{self.user.username} used {self.coupon.code}"
\ No newline at end of file
+        return f"{self.user.username} used {self.coupon.code}"
+
+
+class CouponCounterShard(models.Model):
+    coupon = models.ForeignKey(Coupon, on_delete=models.CASCADE, related_name='counter_shards')
+    shard = models.PositiveSmallIntegerField()
+    count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ('coupon', 'shard')
+
+    def __str__(self):
+        return f"{self.coupon.code} shard {self.shard}: {self.count}"
@@ -1,12 +1,20 @@
 from rest_framework import serializers
 from .models import Coupon , CouponUsage
+from django.db import IntegrityError, transaction
+from django.db.models import F, Q
 from django.utils import timezone
 
+DUPLICATE_CODE_MESSAGE = "An active, valid, and unused coupon with this code already exists."
+
 
 class CouponSerializer(serializers.ModelSerializer):
     class Meta:
         model = Coupon
         fields = ["id","code","discount_percent","valid_from","valid_to","usage_limit","usage_count","is_active"] 
+        # The active-code check lives in validate(); the partial unique
+        # constraint backs it up against concurrent creates.
+        validators = []
+        extra_kwargs = {"code": {"validators": []}}
     
     def validate(self, data):
         valid_from = data.get("valid_from")
@@ -18,18 +26,36 @@ class CouponSerializer(serializers.ModelSerializer):
             })
 
         code = data.get("code")
-        now = timezone.now()
 
         if code:
-            existing_coupons = Coupon.objects.filter(code=code).order_by('-created_at')
-            for coupon in existing_coupons:
-                if coupon.is_active and coupon.valid_to >= now:
-                    if coupon.usage_limit == 0 or coupon.usage_count < coupon.usage_limit:
-                        raise serializers.ValidationError({
-                            "code": "An active, valid, and unused coupon with this code already exists."
-                        })
+            live = Coupon.objects.filter(code=code, is_active=True, valid_to__gte=timezone.now()).filter(
+                Q(usage_limit=0) | Q(usage_count__lt=F('usage_limit'))
+            )
+            if self.instance is not None:
+                live = live.exclude(pk=self.instance.pk)
+            if live.exists():
+                raise serializers.ValidationError({"code": DUPLICATE_CODE_MESSAGE})
 
         return data
+
+    def create(self, validated_data):
+        # Expired or used-up coupons keep is_active until replaced; retire them
+        # so the new coupon can take the code under the unique constraint.
+        try:
+            with transaction.atomic():
+                now = timezone.now()
+                Coupon.objects.filter(code=validated_data['code'], is_active=True).filter(
+                    Q(valid_to__lt=now) | Q(usage_limit__gt=0, usage_count__gte=F('usage_limit'))
+                ).update(is_active=False)
+                return super().create(validated_data)
+        except IntegrityError:
+            raise serializers.ValidationError({"code": DUPLICATE_CODE_MESSAGE})
+
+    def update(self, instance, validated_data):
+        try:
+            return super().update(instance, validated_data)
+        except IntegrityError:
+            raise serializers.ValidationError({"code": DUPLICATE_CODE_MESSAGE})
 class CouponApplySerializer(serializers.Serializer):
     coupon_code = serializers.CharField()
 
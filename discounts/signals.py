@@ -0,0 +1,16 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from demo.cache import invalidate_on_change
+
+from .index import clear_coupon_index
+from .models import Coupon
+
+invalidate_on_change(Coupon)
+
+
+@receiver(post_save, sender=Coupon)
+@receiver(post_delete, sender=Coupon)
+def coupon_changed(sender, **kwargs):
+    transaction.on_commit(clear_coupon_index, using=kwargs.get('using'))
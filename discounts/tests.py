@@ -1,3 +1,248 @@
-from django.test import TestCase
+import threading
+from datetime import timedelta
 
-# Create your tests here.
+from asgiref.sync import async_to_sync
+from django.contrib.auth.models import User
+from django.db import connection, transaction
+from django.test import TransactionTestCase, override_settings
+from django.utils import timezone
+
+from demo.cache import bump_generation
+from demo.testing import QueryBudgetTestCase
+
+from .index import clear_coupon_index, lookup_coupon
+from .models import Coupon, CouponUsage
+from .utils import CouponUnavailable, redeem_coupon
+
+
+def create_coupon(code='HOT', usage_limit=0):
+    now = timezone.now()
+    return Coupon.objects.create(
+        code=code, discount_percent=10, usage_limit=usage_limit,
+        valid_from=now - timedelta(days=1), valid_to=now + timedelta(days=1),
+    )
+
+
+class RedemptionConcurrencyTests(TransactionTestCase):
+    buyers = 10
+
+    def redeem_in_parallel(self, coupon):
+        users = [User.objects.create_user(username=f'buyer{i}') for i in range(self.buyers)]
+        start = threading.Barrier(self.buyers)
+        outcomes = []
+
+        def redeem(user):
+            try:
+                start.wait()
+                with transaction.atomic():
+                    redeem_coupon(coupon, user)
+                outcomes.append('redeemed')
+            except CouponUnavailable as exc:
+                outcomes.append(exc.message)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=redeem, args=(user,)) for user in users]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return outcomes
+
+    def test_usage_limit_is_never_exceeded(self):
+        coupon = create_coupon(usage_limit=4)
+
+        outcomes = self.redeem_in_parallel(coupon)
+
+        self.assertEqual(outcomes.count('redeemed'), 4)
+        self.assertEqual(outcomes.count('Coupon usage limit reached.'), self.buyers - 4)
+        coupon.refresh_from_db()
+        self.assertEqual(coupon.usage_count, 4)
+        self.assertEqual(CouponUsage.objects.filter(coupon=coupon).count(), 4)
+
+    @override_settings(COUPON_COUNTER_SHARDS=4)
+    def test_sharded_counters_count_every_use(self):
+        coupon = create_coupon()
+
+        outcomes = self.redeem_in_parallel(coupon)
+
+        self.assertEqual(outcomes, ['redeemed'] * self.buyers)
+        coupon.refresh_from_db()
+        self.assertEqual(coupon.usage_count, 0)
+        self.assertEqual(coupon.total_usage_count(), self.buyers)
+
+    def test_second_use_by_same_user_is_rejected(self):
+        coupon = create_coupon(usage_limit=5)
+        user = User.objects.create_user(username='buyer')
+        with transaction.atomic():
+            redeem_coupon(coupon, user)
+
+        with self.assertRaisesMessage(CouponUnavailable, 'You have already used this coupon.'):
+            with transaction.atomic():
+                redeem_coupon(coupon, user)
+        coupon.refresh_from_db()
+        self.assertEqual(coupon.usage_count, 1)
+
+    def test_dead_coupon_is_refused_as_invalid_not_used_up(self):
+        user = User.objects.create_user(username='buyer')
+        expired = create_coupon('OLD', usage_limit=5)
+        Coupon.objects.filter(pk=expired.pk).update(valid_to=timezone.now() - timedelta(hours=1))
+        upcoming = create_coupon('SOON', usage_limit=5)
+        Coupon.objects.filter(pk=upcoming.pk).update(valid_from=timezone.now() + timedelta(hours=1))
+        used_up = create_coupon('GONE', usage_limit=1)
+        Coupon.objects.filter(pk=used_up.pk).update(usage_count=1)
+
+        for coupon, message in [
+            (expired, 'Coupon is not valid or expired.'),
+            (upcoming, 'Coupon is not valid or expired.'),
+            (used_up, 'Coupon usage limit reached.'),
+        ]:
+            with self.assertRaisesMessage(CouponUnavailable, message), transaction.atomic():
+                redeem_coupon(coupon, user)
+
+
+class CouponIndexTests(QueryBudgetTestCase):
+    def setUp(self):
+        super().setUp()
+        clear_coupon_index()
+        self.coupon = create_coupon('HOT')
+
+    def test_generation_bump_from_another_worker_retires_entries(self):
+        self.assertEqual(lookup_coupon('HOT').discount_percent, 10)
+        # Another worker's change: no signal fires here, only the shared
+        # generation moves.
+        Coupon.objects.filter(pk=self.coupon.pk).update(discount_percent=25)
+        with self.assertMaxQueries(0):
+            self.assertEqual(lookup_coupon('HOT').discount_percent, 10)
+        bump_generation(Coupon)
+        with self.assertMaxQueries(1):
+            self.assertEqual(lookup_coupon('HOT').discount_percent, 25)
+
+
+    def test_redemption_retires_the_cached_listing(self):
+        admin = User.objects.create_superuser(username='admin', password='secret')
+        self.authenticate(admin)
+        self.assertEqual(self.client.get('/discount/coupon/').data['results'][0]['usage_count'], 0)
+
+        with self.captureOnCommitCallbacks(execute=True), transaction.atomic():
+            redeem_coupon(self.coupon, User.objects.create_user(username='buyer', password='secret'))
+
+        self.assertEqual(self.client.get('/discount/coupon/').data['results'][0]['usage_count'], 1)
+
+
+class EndpointQueryBudgetTests(QueryBudgetTestCase):
+    def setUp(self):
+        super().setUp()
+        now = timezone.now()
+        self.admin = User.objects.create_superuser(username='admin', password='secret')
+        self.user = User.objects.create_user(username='buyer', password='secret')
+        self.coupons = [
+            Coupon.objects.create(
+                code=code, discount_percent=10, valid_from=now - timedelta(days=1), valid_to=now + timedelta(days=1),
+            )
+            for code in ['SAVE10', 'SAVE20', 'SAVE30']
+        ]
+        self.authenticate(self.user)
+
+    def test_coupon_list(self):
+        Coupon.objects.filter(pk=self.coupons[0].pk).update(is_active=False)
+        Coupon.objects.create(
+            code='SAVE10', discount_percent=12, valid_from=self.coupons[0].valid_from, valid_to=self.coupons[0].valid_to,
+        )
+        with self.assertMaxQueries(1):
+            response = self.client.get('/discount/coupon/')
+        latest = {coupon['code']: coupon['discount_percent'] for coupon in response.data['results']}
+        self.assertEqual(latest, {'SAVE10': 12, 'SAVE20': 10, 'SAVE30': 10})
+
+        self.authenticate(self.admin)
+        with self.assertMaxQueries(1):
+            response = self.client.get('/discount/coupon/', {'page_size': 2})
+        self.assertEqual(len(response.data['results']), 2)
+        self.assertIsNotNone(response.data['next'])
+
+    def test_coupon_create(self):
+        now = timezone.now()
+        with self.assertMaxQueries(5):
+            response = self.client.post('/discount/coupon/', {
+                'code': 'NEW', 'discount_percent': 5,
+                'valid_from': now.isoformat(), 'valid_to': (now + timedelta(days=1)).isoformat(),
+            }, format='json')
+        self.assertEqual(response.status_code, 201)
+
+    def test_coupon_create_replaces_only_dead_coupons(self):
+        now = timezone.now()
+        payload = {'discount_percent': 5, 'valid_from': now.isoformat(), 'valid_to': (now + timedelta(days=1)).isoformat()}
+        Coupon.objects.filter(pk=self.coupons[1].pk).update(valid_to=now - timedelta(minutes=1))
+
+        live = self.client.post('/discount/coupon/', {'code': 'SAVE10', **payload}, format='json')
+        expired = self.client.post('/discount/coupon/', {'code': 'SAVE20', **payload}, format='json')
+
+        self.assertEqual(live.status_code, 400)
+        self.assertEqual(expired.status_code, 201)
+        self.assertFalse(Coupon.objects.get(pk=self.coupons[1].pk).is_active)
+        self.assertEqual(Coupon.objects.filter(code='SAVE20', is_active=True).count(), 1)
+
+    def test_coupon_detail_and_update(self):
+        with self.assertMaxQueries(1):
+            response = self.client.get(f'/discount/coupon/{self.coupons[0].pk}/')
+        self.assertEqual(len(response.data), 1)
+        self.authenticate(self.admin)
+        with self.assertMaxQueries(2):
+            response = self.client.patch(f'/discount/coupon/{self.coupons[0].pk}/', {'discount_percent': 15}, format='json')
+        self.assertEqual(response.status_code, 200)
+
+    def test_validate_coupon(self):
+        with self.assertMaxQueries(2):
+            response = self.client.post('/discount/validatecoupon/', {'code': 'SAVE10'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        with self.assertMaxQueries(1):
+            response = self.client.post('/discount/validatecoupon/', {'code': 'SAVE10'}, format='json')
+        self.assertEqual(response.status_code, 200)
+
+        upcoming = self.coupons[1]
+        Coupon.objects.filter(pk=upcoming.pk).update(valid_from=timezone.now() + timedelta(hours=1))
+        bump_generation(Coupon)
+        response = self.client.post('/discount/validatecoupon/', {'code': upcoming.code}, format='json')
+        self.assertEqual(response.status_code, 400)
+
+    def test_endpoint_queries_use_indexes(self):
+        with self.assertQueriesUseIndexes():
+            self.client.get('/discount/coupon/')
+            self.client.get(f'/discount/coupon/{self.coupons[0].pk}/')
+            self.client.post('/discount/validatecoupon/', {'code': 'SAVE10'}, format='json')
+            self.authenticate(self.admin)
+            self.client.get('/discount/coupon/', {'page_size': 2})
+            self.client.patch(f'/discount/coupon/{self.coupons[0].pk}/', {'discount_percent': 15}, format='json')
+
+    def test_validate_coupon_checks_usage_in_database(self):
+        self.client.post('/discount/validatecoupon/', {'code': 'SAVE10'}, format='json')
+        Coupon.objects.filter(pk=self.coupons[0].pk).update(usage_limit=1, usage_count=1)
+
+        response = self.client.post('/discount/validatecoupon/', {'code': 'SAVE10'}, format='json')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['message'], 'Coupon usage limit reached.')
+
+    def test_unknown_codes_are_answered_from_the_snapshot(self):
+        self.client.post('/discount/validatecoupon/', {'code': 'GUESS'}, format='json')
+        with self.assertMaxQueries(0):
+            for i in range(50):
+                response = self.client.post('/discount/validatecoupon/', {'code': f'GUESS{i}'}, format='json')
+                self.assertEqual(response.status_code, 400)
+        with self.assertMaxQueries(1):
+            response = self.client.post('/discount/validatecoupon/', {'code': 'SAVE20'}, format='json')
+        self.assertEqual(response.status_code, 200)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            create_coupon(code='GUESS')
+        response = self.client.post('/discount/validatecoupon/', {'code': 'GUESS'}, format='json')
+        self.assertEqual(response.status_code, 200)
+
+    def test_async_validate_coupon(self):
+        headers = {'Authorization': self.client._credentials['HTTP_AUTHORIZATION']}
+        post = async_to_sync(self.async_client.post)
+        with self.assertMaxQueries(2):
+            response = post('/discount/async/validatecoupon/', {'code': 'SAVE10'},
+                            content_type='application/json', headers=headers)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['discount_percent'], 10)
@@ -1,8 +1,10 @@
 from django.urls import path
+from .async_views import AsyncValidateCouponAPIView
 from .views import CouponAPIView,CouponListCreateAPIView,ValidateCouponAPIView
 
 urlpatterns = [
     path('coupon/', CouponListCreateAPIView.as_view(), name='get-add-coupon'),
     path('coupon/<uuid:pk>/', CouponAPIView.as_view(), name='update-delete'),
-    path('validatecoupon/',ValidateCouponAPIView.as_view(),name="validate-coupon")
+    path('validatecoupon/',ValidateCouponAPIView.as_view(),name="validate-coupon"),
+    path('async/validatecoupon/',AsyncValidateCouponAPIView.as_view(),name="async-validate-coupon"),
     ]
\ No newline at end of file
@@ -1,6 +1,15 @@
+import random
+
+from django.conf import settings
+from django.db import IntegrityError, connections, transaction
+from django.db.models import Exists, F, OuterRef, Q, Window
+from django.db.models.functions import RowNumber
 from django.utils import timezone
 from rest_framework.response import Response
-from .models import Coupon
+
+from demo.cache import bump_generation
+
+from .models import Coupon, CouponCounterShard, CouponUsage
 from rest_framework import status
 
 def validate_code(coupon):
@@ -9,10 +18,104 @@ def validate_code(coupon):
         return False, "Invalid Coupon Code."
 
     now = timezone.now()
+    if coupon.valid_from > now:
+        return False, "Coupon is not valid yet."
     if coupon.valid_to < now:
         return False, "Coupon has expired."
 
     if coupon.usage_limit and coupon.usage_count >= coupon.usage_limit:
         return False, "Coupon usage limit reached."
 
-    return True,0
\ No newline at end of file
+    return True,0
+
+
+def latest_coupons_per_code():
+    """
+    Active coupons, newest per code, resolved in one database-side query:
+    DISTINCT ON where the backend has it (PostgreSQL), ROW_NUMBER() elsewhere.
+    Returned as a pk__in filter so callers can still order and paginate it.
+    """
+    coupons = Coupon.objects.filter(is_active=True)
+    if connections[coupons.db].features.can_distinct_on_fields:
+        latest = coupons.order_by('code', '-created_at', '-id').distinct('code')
+    else:
+        latest = coupons.annotate(rank=Window(
+            RowNumber(), partition_by=F('code'), order_by=[F('created_at').desc(), F('id').desc()],
+        )).filter(rank=1)
+    return Coupon.objects.filter(pk__in=latest.values('pk'))
+
+
+def coupon_usage(coupon, user):
+    """
+    Authoritative usage state of ``coupon`` for ``user``, as a one-row query:
+    it yields None when the usage limit is reached, otherwise whether ``user``
+    has already used the coupon. Callers pick ``.first()`` or ``.afirst()``.
+    """
+    return (
+        Coupon.objects.filter(pk=coupon.pk)
+        .filter(Q(usage_limit=0) | Q(usage_count__lt=F('usage_limit')))
+        .annotate(used=Exists(CouponUsage.objects.filter(user=user, coupon=OuterRef('pk'))))
+        .values_list('used', flat=True)
+    )
+
+
+class CouponUnavailable(Exception):
+    def __init__(self, message):
+        self.message = message
+        super().__init__(message)
+
+
+def redeem_coupon(coupon, user):
+    """
+    Record one use of ``coupon`` by ``user``, enforcing the usage limit in the
+    same statement that counts the use.
+
+    Must run inside the checkout's ``transaction.atomic``. The counter update
+    holds a row lock until that transaction commits, so call this as late in
+    the transaction as possible. Raises CouponUnavailable when the coupon is
+    no longer live, its limit is reached or the user already used it.
+    """
+    now = timezone.now()
+    live = Coupon.objects.filter(pk=coupon.pk, is_active=True, valid_from__lte=now, valid_to__gte=now)
+
+    if coupon.usage_limit == 0 and settings.COUPON_COUNTER_SHARDS:
+        if not increment_counter_shard(coupon, live):
+            raise CouponUnavailable("Coupon is not valid or expired.")
+    else:
+        updated = (
+            live.filter(Q(usage_limit=0) | Q(usage_count__lt=F('usage_limit')))
+            .update(usage_count=F('usage_count') + 1)
+        )
+        if not updated:
+            # The update can't say why it matched nothing; only a live coupon
+            # can have run out of uses.
+            if live.exists():
+                raise CouponUnavailable("Coupon usage limit reached.")
+            raise CouponUnavailable("Coupon is not valid or expired.")
+
+    try:
+        with transaction.atomic():
+            CouponUsage.objects.create(user=user, coupon=coupon)
+    except IntegrityError:
+        raise CouponUnavailable("You have already used this coupon.")
+
+    # The counter was changed with update(), which sends no post_save, so the
+    # cached coupon listing is retired by hand.
+    transaction.on_commit(lambda: bump_generation(Coupon))
+
+
+def increment_counter_shard(coupon, live):
+    # Spreads the writes for a hot unlimited coupon over several rows so
+    # concurrent checkouts don't all queue on the coupon row's lock.
+    shard = random.randrange(settings.COUPON_COUNTER_SHARDS)
+    counter = CouponCounterShard.objects.filter(coupon=coupon, shard=shard, coupon__in=live)
+    if counter.update(count=F('count') + 1):
+        return True
+    if not live.exists():
+        return False
+    try:
+        with transaction.atomic():
+            CouponCounterShard.objects.create(coupon=coupon, shard=shard, count=1)
+    except IntegrityError:
+        counter.update(count=F('count') + 1)
+    return True
@@ -1,18 +1,20 @@
 from django.shortcuts import render
 from rest_framework.views import APIView
-from rest_framework_simplejwt.authentication import JWTAuthentication
+from authentication.authentication import CachedJWTAuthentication
 from .serializers import CouponSerializer , CouponValidateSerializer ,CouponApplySerializer
 from rest_framework.response import Response
 from django.shortcuts import get_object_or_404
 from rest_framework import status
 from drf_spectacular.utils import extend_schema
-from .models import Coupon,CouponUsage
+from .models import Coupon
 from datetime import date
 from django.utils import timezone
-from django.db.models import Max
-from .utils import validate_code
+from .utils import validate_code, latest_coupons_per_code, coupon_usage
+from .index import lookup_coupon
+from app1.pagination import KeysetPagination
+from demo.cache import cached_read
 class CouponAPIView(APIView):
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [CachedJWTAuthentication]
     @extend_schema(
         request=CouponApplySerializer,  
         responses={200: CouponSerializer}  
@@ -47,7 +49,7 @@ class CouponAPIView(APIView):
 
 
 class CouponListCreateAPIView(APIView):
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [CachedJWTAuthentication]
 
     @extend_schema(
         request=CouponApplySerializer,  
@@ -67,25 +69,23 @@ class CouponListCreateAPIView(APIView):
     responses={200: CouponSerializer(many=True)})
 
     def get(self, request):
+        data = cached_read('coupons', [Coupon], lambda: self.list_coupons(request),
+                           params=(request.user.is_superuser, request.build_absolute_uri()))
+        return Response(data, status=status.HTTP_200_OK)
+
+    def list_coupons(self, request):
         if request.user.is_superuser:
             coupons = Coupon.objects.all()
         else:
-            latest_ids = (
-            Coupon.objects.filter(is_active=True)
-            .values("code")
-            .annotate(latest_created=Max("created_at"))
-        )
-        from django.db.models import Q
-        q_objects = Q()
-        for item in latest_ids:
-            q_objects |= Q(code=item["code"], created_at=item["latest_created"])
-
-        coupons = Coupon.objects.filter(q_objects)
-        serializer = CouponSerializer(coupons, many=True)
-        return Response(serializer.data, status=status.HTTP_200_OK)
+            coupons = latest_coupons_per_code()
+
+        paginator = KeysetPagination()
+        page = paginator.paginate_queryset(coupons, request, view=self)
+        serializer = CouponSerializer(page, many=True)
+        return paginator.get_paginated_response(serializer.data).data
     
 class ValidateCouponAPIView(APIView):
-    authentication_classes = [JWTAuthentication]
+    authentication_classes = [CachedJWTAuthentication]
     @extend_schema(
         request=CouponValidateSerializer,
         responses={200: dict}  
@@ -96,18 +96,16 @@ class ValidateCouponAPIView(APIView):
         if serializer.is_valid():
             code = serializer.validated_data['code']
 
-            coupon = (
-                Coupon.objects
-                .filter(code=code, is_active=True)
-                .order_by('-created_at')
-                .first()
-            )
+            coupon = lookup_coupon(code)
 
             is_valid, result = validate_code(coupon)
             if not is_valid:
                 return Response({"message": result}, status=status.HTTP_400_BAD_REQUEST)
 
-            if CouponUsage.objects.filter(user=request.user, coupon=coupon).exists():
+            used = coupon_usage(coupon, request.user).first()
+            if used is None:
+                return Response({"message": "Coupon usage limit reached."}, status=status.HTTP_400_BAD_REQUEST)
+            if used:
                 return Response({'detail': 'You have already used this coupon.'}, status=status.HTTP_400_BAD_REQUEST)
 
             return Response({
@@ -0,0 +1,77 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from app1.models import OrderItem
+from reports.models import DailyItemSales
+from reports.rollups import add_deltas, order_deltas
+
+
+class Command(BaseCommand):
+    help = (
+        "Rebuild the daily sales rollups from the orders, one day at a time. Checkout and cancellation keep "
+        "them current, so this is for the initial backfill or after a repair. Each day is replaced in its own "
+        "transaction; rebuild the current day while checkout is quiet. Rebuilt rows take each item's current "
+        "category."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--from', dest='date_from', help="First day to rebuild (YYYY-MM-DD).")
+        parser.add_argument('--to', dest='date_to', help="Last day to rebuild (YYYY-MM-DD).")
+        parser.add_argument('--chunk-size', type=int, default=2000)
+
+    def handle(self, *args, **options):
+        lines = OrderItem.objects.order_by('order__created_at', 'order_id')
+        rollups = DailyItemSales.objects.all()
+        if options['date_from']:
+            lines = lines.filter(order__created_at__date__gte=options['date_from'])
+            rollups = rollups.filter(day__gte=options['date_from'])
+        if options['date_to']:
+            lines = lines.filter(order__created_at__date__lte=options['date_to'])
+            rollups = rollups.filter(day__lte=options['date_to'])
+
+        # Days whose orders are all gone must not keep their old rows.
+        stale_days = set(rollups.values_list('day', flat=True).distinct())
+        rows = lines.values_list(
+            'order_id', 'order__created_at', 'order__discounted_amount', 'order__order_status',
+            'item_id', 'item__category_id', 'quantity', 'line_total',
+        ).iterator(chunk_size=options['chunk_size'])
+
+        # Lines arrive grouped by order and orders by day, so only the current
+        # order's lines and the current day's totals are held in memory.
+        days = 0
+        day, totals, order = None, {}, None
+        for order_id, created_at, discount, order_status, item_id, category_id, quantity, line_total in rows:
+            if order is None or order[0] != order_id:
+                if order is not None:
+                    self.add_order(totals, *order[1:])
+                order_day = timezone.localdate(created_at)
+                if order_day != day:
+                    if day is not None:
+                        self.write_day(day, totals)
+                        stale_days.discard(day)
+                        days += 1
+                    day, totals = order_day, {}
+                order = (order_id, discount, order_status == 'Cancelled', [])
+            order[3].append((item_id, category_id, quantity, line_total))
+        if order is not None:
+            self.add_order(totals, *order[1:])
+            self.write_day(day, totals)
+            stale_days.discard(day)
+            days += 1
+
+        DailyItemSales.objects.filter(day__in=stale_days).delete()
+        self.stdout.write(f"Rebuilt {days} days of sales rollups, cleared {len(stale_days)} days without orders.")
+
+    def add_order(self, totals, discount, cancelled, lines):
+        add_deltas(totals, order_deltas(lines, discount))
+        if cancelled:
+            add_deltas(totals, order_deltas(lines, discount, cancelled=True))
+
+    def write_day(self, day, totals):
+        with transaction.atomic():
+            DailyItemSales.objects.filter(day=day).delete()
+            DailyItemSales.objects.bulk_create([
+                DailyItemSales(day=day, item_id=item_id, category_id=category_id, **amounts)
+                for item_id, (category_id, amounts) in totals.items()
+            ])
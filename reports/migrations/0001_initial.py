@@ -0,0 +1,36 @@
+# Generated by Django 5.2.4 on 2026-10-18 19:18
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ('app1', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyItemSales',
+            fields=[
+                ('id', models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ('day', models.DateField()),
+                ('units_sold', models.PositiveIntegerField(default=0)),
+                ('gross_revenue', models.FloatField(default=0)),
+                ('discount_total', models.FloatField(default=0, help_text="Share of the orders' discounted_amount")),
+                ('units_cancelled', models.PositiveIntegerField(default=0)),
+                ('cancelled_revenue', models.FloatField(default=0)),
+                ('cancelled_discount', models.FloatField(default=0)),
+                ('category', models.ForeignKey(db_constraint=False, help_text="The item's category when the row was started", null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='daily_sales', to='app1.category')),
+                ('item', models.ForeignKey(db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='daily_sales', to='app1.item')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['day', 'category'], name='daily_item_sales_day_cat_idx')],
+                'constraints': [models.UniqueConstraint(fields=('day', 'item'), name='daily_item_sales_day_item')],
+            },
+        ),
+    ]
@@ -0,0 +1,37 @@
+import uuid
+from django.db import models
+
+from app1.models import Category, Item
+
+
+class DailyItemSales(models.Model):
+    """
+    Sales of one item on one day, kept up to date by checkout and
+    cancellation. Cancellations are booked against the day the order was
+    placed, so a day's row always describes that day's orders.
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    day = models.DateField()
+    # History outlives the catalog: deleting an item or category leaves its
+    # rollup rows (and their ids) alone instead of touching them on delete.
+    item = models.ForeignKey(Item, on_delete=models.DO_NOTHING, db_constraint=False, null=True,
+                             related_name='daily_sales')
+    category = models.ForeignKey(Category, on_delete=models.DO_NOTHING, db_constraint=False, null=True,
+                                 related_name='daily_sales', help_text="The item's category when the row was started")
+    units_sold = models.PositiveIntegerField(default=0)
+    gross_revenue = models.FloatField(default=0)
+    discount_total = models.FloatField(default=0, help_text="Share of the orders' discounted_amount")
+    units_cancelled = models.PositiveIntegerField(default=0)
+    cancelled_revenue = models.FloatField(default=0)
+    cancelled_discount = models.FloatField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['day', 'item'], name='daily_item_sales_day_item'),
+        ]
+        indexes = [
+            models.Index(fields=['day', 'category'], name='daily_item_sales_day_cat_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.day} {self.item_id}"
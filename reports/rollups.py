@@ -0,0 +1,105 @@
+"""
+Incremental upkeep of the DailyItemSales rollup.
+
+Checkout and cancellation hand over an order's lines and the rollup rows for
+that order's day are adjusted in place, inside the caller's transaction. Both
+callers already hold the row locks on the items involved, so two writers never
+race on the same (day, item) row. Order discounts are split over the lines in
+proportion to their totals, to the cent, so a day's discount_total adds up to
+the sum of its orders' discounted_amount.
+"""
+from django.utils import timezone
+
+from .models import DailyItemSales
+
+SALE_FIELDS = ['units_sold', 'gross_revenue', 'discount_total']
+CANCEL_FIELDS = ['units_cancelled', 'cancelled_revenue', 'cancelled_discount']
+ROLLUP_FIELDS = SALE_FIELDS + CANCEL_FIELDS
+
+
+def sales_day(order):
+    return timezone.localdate(order.created_at)
+
+
+def order_lines(lines):
+    """Merge (item_id, category_id, quantity, line_total) tuples per item."""
+    merged = {}
+    for item_id, category_id, quantity, line_total in lines:
+        _, merged_quantity, merged_total = merged.get(item_id, (category_id, 0, 0.0))
+        merged[item_id] = (category_id, merged_quantity + quantity, merged_total + line_total)
+    return merged
+
+
+def allocate_discount(lines, discount):
+    """
+    Split ``discount`` over the merged ``lines`` in proportion to their totals.
+    The rounding remainder goes to the last line in item id order, so the same
+    order always splits the same way.
+    """
+    item_ids = sorted(lines, key=str)
+    gross = sum(lines[item_id][2] for item_id in item_ids)
+    shares = {}
+    remaining = discount
+    for index, item_id in enumerate(item_ids):
+        if index == len(item_ids) - 1:
+            share = round(remaining, 2)
+        else:
+            share = round(discount * lines[item_id][2] / gross, 2) if gross else 0.0
+            remaining -= share
+        shares[item_id] = share
+    return shares
+
+
+def order_deltas(lines, discount, cancelled=False):
+    lines = order_lines(lines)
+    shares = allocate_discount(lines, discount or 0.0)
+    fields = CANCEL_FIELDS if cancelled else SALE_FIELDS
+    return {
+        item_id: (category_id, dict(zip(fields, (quantity, line_total, shares[item_id]))))
+        for item_id, (category_id, quantity, line_total) in lines.items()
+    }
+
+
+def add_deltas(totals, deltas):
+    """Fold ``deltas`` into ``totals``, an in-memory {item_id: (category_id, {field: amount})}."""
+    for item_id, (category_id, amounts) in deltas.items():
+        _, current = totals.setdefault(item_id, (category_id, dict.fromkeys(ROLLUP_FIELDS, 0)))
+        for field, amount in amounts.items():
+            current[field] = round(current[field] + amount, 2)
+
+
+def apply_deltas(day, deltas):
+    """Add ``deltas`` ({item_id: (category_id, {field: amount})}) to the rows for ``day``."""
+    if not deltas:
+        return
+    rows = {
+        row.item_id: row
+        for row in DailyItemSales.objects.select_for_update().filter(day=day, item_id__in=deltas)
+    }
+    created, updated = [], []
+    for item_id, (category_id, amounts) in deltas.items():
+        row = rows.get(item_id)
+        if row is None:
+            created.append(DailyItemSales(day=day, item_id=item_id, category_id=category_id, **amounts))
+            continue
+        for field, amount in amounts.items():
+            setattr(row, field, round(getattr(row, field) + amount, 2))
+        updated.append(row)
+    if created:
+        DailyItemSales.objects.bulk_create(created)
+    if updated:
+        DailyItemSales.objects.bulk_update(updated, ROLLUP_FIELDS)
+
+
+def record_sale(order, order_items):
+    """Book a freshly placed ``order`` and its OrderItem instances."""
+    lines = [
+        (line.item_id, line.item.category_id, line.quantity, line.line_total)
+        for line in order_items
+    ]
+    apply_deltas(sales_day(order), order_deltas(lines, order.discounted_amount))
+
+
+def record_cancellation(order, lines):
+    """Book the cancellation of ``order``; ``lines`` as for order_lines()."""
+    apply_deltas(sales_day(order), order_deltas(lines, order.discounted_amount, cancelled=True))
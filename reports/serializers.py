@@ -0,0 +1,28 @@
+from datetime import timedelta
+
+from django.utils import timezone
+from rest_framework import serializers
+
+REPORT_DAYS = 30
+
+
+class SalesReportFilterSerializer(serializers.Serializer):
+    date_from = serializers.DateField(required=False)
+    date_to = serializers.DateField(required=False)
+    category = serializers.UUIDField(required=False)
+    limit = serializers.IntegerField(required=False, min_value=1, max_value=1000, default=100)
+
+    def validate(self, data):
+        # Defaults to the last REPORT_DAYS days, today included.
+        data.setdefault('date_to', timezone.localdate())
+        data.setdefault('date_from', data['date_to'] - timedelta(days=REPORT_DAYS - 1))
+        if data['date_from'] > data['date_to']:
+            raise serializers.ValidationError({"date_to": "date_to must be after or equal to date_from."})
+        return data
+
+    def filter_queryset(self, queryset):
+        data = self.validated_data
+        queryset = queryset.filter(day__gte=data['date_from'], day__lte=data['date_to'])
+        if 'category' in data:
+            queryset = queryset.filter(category_id=data['category'])
+        return queryset
@@ -0,0 +1,101 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.utils import timezone
+
+from app1.models import Category, Item
+from app1.tests import create_buyer
+from demo.testing import QueryBudgetTestCase
+from discounts.tests import create_coupon
+
+from .models import DailyItemSales
+from .rollups import ROLLUP_FIELDS, allocate_discount
+
+
+def rollup_rows():
+    return {
+        row['item_id']: {field: row[field] for field in ['category_id'] + ROLLUP_FIELDS}
+        for row in DailyItemSales.objects.values('item_id', 'category_id', *ROLLUP_FIELDS)
+    }
+
+
+class SalesRollupTests(QueryBudgetTestCase):
+    def setUp(self):
+        super().setUp()
+        self.admin = User.objects.create_superuser(username='admin', password='secret')
+        self.books = Category.objects.create(name='Books')
+        self.pens = Category.objects.create(name='Pens')
+        self.book = Item.objects.create(category=self.books, description='Book', rate=100, stock_count=50)
+        self.pen = Item.objects.create(category=self.pens, description='Pen', rate=3.33, stock_count=50)
+        create_coupon('TENOFF')
+
+    def checkout(self, username, items, coupon_code=None):
+        self.authenticate(create_buyer(username, items))
+        response = self.client.post('/api/order/', {'coupon_code': coupon_code} if coupon_code else {}, format='json')
+        self.assertEqual(response.status_code, 201)
+        return response
+
+    def test_checkout_and_cancellation_update_rollups(self):
+        self.checkout('first', [(self.book, 2), (self.pen, 3)], coupon_code='TENOFF')
+        self.checkout('second', [(self.pen, 1)])
+        rows = rollup_rows()
+        self.assertEqual((rows[self.book.pk]['units_sold'], rows[self.pen.pk]['units_sold']), (2, 4))
+        self.assertEqual(rows[self.pen.pk]['category_id'], self.pens.pk)
+        self.assertEqual(round(rows[self.book.pk]['gross_revenue'] + rows[self.pen.pk]['gross_revenue'], 2), 213.32)
+        # The first order's 20.999 discount, rounded to 21.0, is split over both lines.
+        self.assertEqual(round(rows[self.book.pk]['discount_total'] + rows[self.pen.pk]['discount_total'], 2), 21.0)
+
+        order = self.client.get('/api/order/history/').data['results'][0]
+        response = self.client.patch(f'/api/order/{order["id"]}/', {'order_status': 'Cancelled'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        rows = rollup_rows()
+        self.assertEqual((rows[self.pen.pk]['units_sold'], rows[self.pen.pk]['units_cancelled']), (4, 1))
+        self.assertEqual(rows[self.pen.pk]['cancelled_revenue'], 3.33)
+
+    def test_rebuild_reproduces_incremental_rollups(self):
+        self.checkout('first', [(self.book, 2), (self.pen, 3)], coupon_code='TENOFF')
+        self.checkout('second', [(self.pen, 1), (self.book, 1)])
+        order = self.client.get('/api/order/history/').data['results'][0]
+        self.client.patch(f'/api/order/{order["id"]}/', {'order_status': 'Cancelled'}, format='json')
+        incremental = rollup_rows()
+        DailyItemSales.objects.filter(item=self.book).update(units_sold=0)
+        DailyItemSales.objects.create(day=timezone.localdate() - timedelta(days=3), item=self.pen)
+
+        out = StringIO()
+        call_command('rebuild_sales_rollups', stdout=out)
+
+        self.assertIn('Rebuilt 1 days of sales rollups, cleared 1 days without orders.', out.getvalue())
+        self.assertEqual(rollup_rows(), incremental)
+
+    def test_discount_split_adds_up_to_the_cent(self):
+        lines = {'a': (None, 1, 10.0), 'b': (None, 1, 10.0), 'c': (None, 1, 10.0)}
+        shares = allocate_discount(lines, 10.0)
+        self.assertEqual(shares, {'a': 3.33, 'b': 3.33, 'c': 3.34})
+
+    def test_reports_read_rollups_only(self):
+        self.checkout('first', [(self.book, 2), (self.pen, 3)], coupon_code='TENOFF')
+        self.authenticate(self.admin)
+
+        with self.assertQueriesUseIndexes(), self.assertMaxQueries(1):
+            response = self.client.get('/reports/sales/daily/')
+        self.assertEqual(response.status_code, 200)
+        [day] = response.data['results']
+        self.assertEqual((day['day'], day['units_sold'], day['gross_revenue']), (timezone.localdate(), 5, 209.99))
+        self.assertEqual(day['net_revenue'], 188.99)
+
+        with self.assertMaxQueries(1):
+            response = self.client.get('/reports/sales/items/', {'limit': 1})
+        self.assertEqual([row['item'] for row in response.data['results']], [self.pen.pk])
+
+        with self.assertQueriesUseIndexes(), self.assertMaxQueries(1):
+            response = self.client.get('/reports/sales/categories/', {'category': str(self.books.pk)})
+        self.assertEqual([row['category'] for row in response.data['results']], [self.books.pk])
+
+        response = self.client.get('/reports/sales/daily/', {'date_from': '2025-02-01', 'date_to': '2025-01-01'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_reports_are_for_superusers(self):
+        self.authenticate(create_buyer('buyer', []))
+        self.assertEqual(self.client.get('/reports/sales/daily/').status_code, 403)
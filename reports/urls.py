@@ -0,0 +1,8 @@
+from django.urls import path
+from .views import DailySalesReportAPIView, ItemSalesReportAPIView, CategorySalesReportAPIView
+
+urlpatterns = [
+    path('sales/daily/', DailySalesReportAPIView.as_view(), name='sales-report-daily'),
+    path('sales/items/', ItemSalesReportAPIView.as_view(), name='sales-report-items'),
+    path('sales/categories/', CategorySalesReportAPIView.as_view(), name='sales-report-categories'),
+    ]
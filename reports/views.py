@@ -0,0 +1,73 @@
+from django.db.models import F, Sum
+from rest_framework import status
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from authentication.authentication import CachedJWTAuthentication
+
+from .models import DailyItemSales
+from .rollups import ROLLUP_FIELDS
+from .serializers import SalesReportFilterSerializer
+
+
+class SalesReportAPIView(APIView):
+    """
+    Sales totals grouped by ``group_by``, read from the daily rollups only,
+    never from the order tables. Net revenue is gross revenue less discounts,
+    less what was cancelled.
+    """
+    authentication_classes = [CachedJWTAuthentication]
+    permission_classes = [IsAuthenticated]
+    group_by = None
+    ordering = None
+    limited = False
+
+    def get(self, request):
+        if not request.user.is_superuser:
+            return Response({'error': 'Permission Denied.'}, status=status.HTTP_403_FORBIDDEN)
+
+        filters = SalesReportFilterSerializer(data=request.query_params)
+        if not filters.is_valid():
+            return Response(filters.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        rows = (
+            filters.filter_queryset(DailyItemSales.objects.all())
+            .values(self.group_by)
+            .annotate(**{field: Sum(field) for field in ROLLUP_FIELDS})
+            .annotate(net_revenue=(
+                F('gross_revenue') - F('discount_total') - F('cancelled_revenue') + F('cancelled_discount')
+            ))
+            .order_by(*self.ordering)
+        )
+        if self.limited:
+            rows = rows[:filters.validated_data['limit']]
+
+        return Response({
+            'date_from': filters.validated_data['date_from'],
+            'date_to': filters.validated_data['date_to'],
+            'results': [self.present(row) for row in rows],
+        }, status=status.HTTP_200_OK)
+
+    def present(self, row):
+        row = dict(row)
+        for field in ROLLUP_FIELDS + ['net_revenue']:
+            if isinstance(row[field], float):
+                row[field] = round(row[field], 2)
+        return row
+
+
+class DailySalesReportAPIView(SalesReportAPIView):
+    group_by = 'day'
+    ordering = ['day']
+
+
+class ItemSalesReportAPIView(SalesReportAPIView):
+    group_by = 'item'
+    ordering = ['-units_sold', 'item']
+    limited = True
+
+
+class CategorySalesReportAPIView(SalesReportAPIView):
+    group_by = 'category'
+    ordering = ['-gross_revenue', 'category']